@@ -0,0 +1,84 @@
+"""Micro-benchmark for adjust_markdown_headings on a synthetic 5,000-heading document.
+
+Compares the single-pass normalizer with the per-heading regex replacement it
+replaced, and checks that both produce the same markdown.
+
+    uv run python -m benchmarks.adjust_markdown_headings
+"""
+
+import argparse
+import random
+import time
+
+from src.utils.md import (
+    _adjust_markdown_headings_sequential,
+    _heading_levels,
+    adjust_markdown_headings,
+)
+
+
+def build_document(heading_count, seed=0):
+    rng = random.Random(seed)
+    toc = []
+    lines = []
+
+    for index in range(heading_count):
+        level = rng.randint(1, 4)
+        heading_text = f"Section {index}: Configuring {rng.choice(['Amazon EC2', 'AWS Lambda', 'Amazon S3 (Standard)'])}"
+        toc.append([level, heading_text, index // 3 + 1])
+
+        # Docling emits most headings as "##", so levels usually need fixing.
+        lines.append(f"## {heading_text}")
+        lines.append("")
+        for _ in range(rng.randint(1, 4)):
+            lines.append(
+                " ".join(
+                    rng.choice(["lorem", "ipsum", "dolor", "sit", "amet"])
+                    for _ in range(40)
+                )
+            )
+            lines.append("")
+
+    return "\n".join(lines), toc
+
+
+def legacy_adjust_markdown_headings(markdown_doc, toc):
+    return _adjust_markdown_headings_sequential(markdown_doc, _heading_levels(toc))
+
+
+def measure(fn, markdown_doc, toc, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(markdown_doc, toc)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--headings", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    markdown_doc, toc = build_document(args.headings)
+    print(f"Document: {args.headings} headings, {len(markdown_doc) / 1e6:.1f} MB")
+
+    # The per-heading version takes minutes at this size, so it runs once.
+    legacy_time, legacy_result = measure(
+        legacy_adjust_markdown_headings, markdown_doc, toc, 1
+    )
+    new_time, new_result = measure(
+        adjust_markdown_headings, markdown_doc, toc, args.repeat
+    )
+
+    if new_result != legacy_result:
+        raise SystemExit("Outputs differ")
+
+    print(f"Per-heading regex: {legacy_time * 1000:.1f} ms")
+    print(f"Single pass:       {new_time * 1000:.1f} ms")
+    print(f"Speedup:           {legacy_time / new_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Recall of reduced-dimension and binary Titan embeddings against 1024-dim floats.
+
+Samples chunks from the 1024-dimension float collection, embeds them with
+every embedding setting (through the embedding cache, so repeated runs only
+call Bedrock for new texts) and compares exact top-k neighbours of each
+setting with those of the 1024-dimension float vectors.
+
+    uv run python -m benchmarks.embedding_recall --sample 1000 --k 10
+    uv run python -m benchmarks.embedding_recall --queries queries.txt
+
+Queries come from a text file with one query per line, or are a random
+subset of the sampled chunks, whose own match is then ignored.
+"""
+
+import argparse
+import random
+
+import numpy as np
+
+from src.vector_store.embeddings import (
+    EMBEDDING_TYPE_BINARY,
+    EMBEDDING_TYPE_FLOAT,
+)
+from src.vector_store.qdrant_manager import (
+    _embed_texts,
+    setup_qdrant_client,
+)
+
+REFERENCE_SETTING = (1024, EMBEDDING_TYPE_FLOAT)
+SETTINGS = [
+    (512, EMBEDDING_TYPE_FLOAT),
+    (256, EMBEDDING_TYPE_FLOAT),
+    (1024, EMBEDDING_TYPE_BINARY),
+    (512, EMBEDDING_TYPE_BINARY),
+    (256, EMBEDDING_TYPE_BINARY),
+]
+
+
+def sample_chunks(sample_size, seed):
+    client, collection_name = setup_qdrant_client(*REFERENCE_SETTING)
+
+    texts = []
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=collection_name,
+            limit=1000,
+            offset=offset,
+            with_payload=["page_content"],
+            with_vectors=False,
+        )
+        texts.extend(record.payload["page_content"] for record in records)
+        if offset is None:
+            break
+
+    random.Random(seed).shuffle(texts)
+    return texts[:sample_size]
+
+
+def embed(texts, dimensions, embedding_type):
+    vectors = _embed_texts(texts, dimensions, embedding_type)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def top_k(query_vectors, chunk_vectors, embedding_type, k, exclude=None):
+    if embedding_type == EMBEDDING_TYPE_BINARY:
+        # Hamming distance between 0/1 vectors, as a similarity.
+        scores = -(
+            query_vectors @ (1 - chunk_vectors).T
+            + (1 - query_vectors) @ chunk_vectors.T
+        )
+    else:
+        # Titan vectors are normalized, so the dot product is the cosine.
+        scores = query_vectors @ chunk_vectors.T
+
+    if exclude is not None:
+        scores[np.arange(len(exclude)), exclude] = -np.inf
+
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def recall(reference, candidate):
+    k = reference.shape[1]
+    return np.mean(
+        [len(set(ref) & set(cand)) / k for ref, cand in zip(reference, candidate)]
+    )
+
+
+def bytes_per_vector(dimensions, embedding_type):
+    # Binary vectors are stored as one uint8 per dimension.
+    return dimensions if embedding_type == EMBEDDING_TYPE_BINARY else dimensions * 4
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sample", type=int, default=1000)
+    parser.add_argument("--query-count", type=int, default=100)
+    parser.add_argument("--queries", help="Text file with one query per line.")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    chunks = sample_chunks(args.sample, args.seed)
+    if len(chunks) <= args.k:
+        raise SystemExit(f"Need more than {args.k} chunks, found {len(chunks)}.")
+
+    if args.queries:
+        with open(args.queries) as f:
+            queries = [line.strip() for line in f if line.strip()]
+        exclude = None
+    else:
+        query_indices = list(range(min(args.query_count, len(chunks))))
+        queries = [chunks[i] for i in query_indices]
+        exclude = np.asarray(query_indices)
+
+    print(f"{len(chunks)} chunks, {len(queries)} queries, recall@{args.k}")
+
+    reference = None
+    for dimensions, embedding_type in [REFERENCE_SETTING, *SETTINGS]:
+        chunk_vectors = embed(chunks, dimensions, embedding_type)
+        query_vectors = embed(queries, dimensions, embedding_type)
+        neighbours = top_k(
+            query_vectors, chunk_vectors, embedding_type, args.k, exclude
+        )
+        if reference is None:
+            reference = neighbours
+
+        print(
+            f"{dimensions:>5} {embedding_type:<7} "
+            f"{bytes_per_vector(dimensions, embedding_type):>5} bytes/vector  "
+            f"recall@{args.k} {recall(reference, neighbours):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
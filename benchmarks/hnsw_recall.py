@@ -0,0 +1,233 @@
+"""Recall-versus-latency benchmark for HNSW and quantization settings.
+
+Ground truth is an exact search over the same points. The collection's own
+index is swept over ``hnsw_ef``; with ``--build``, a sample of its points is
+copied into temporary collections for every ``m`` / ``ef_construct`` /
+quantization combination, which are swept the same way and deleted again.
+Every setting reports recall@k, p50/p95/p99 latency and QPS at each
+concurrency level.
+
+    uv run python -m benchmarks.hnsw_recall --ef 16 32 64 128 256
+    uv run python -m benchmarks.hnsw_recall --build --points 20000 \\
+        --m 8 16 32 --ef-construct 64 128 256 --quantization none scalar
+
+Queries are stored vectors, whose own point is left out of the results, or
+texts from a file with one query per line when ``--queries-file`` is given.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from qdrant_client import models
+
+from src.vector_store.collection_profiles import (
+    create_quantization_config,
+    wait_for_collection,
+)
+from src.vector_store.qdrant_manager import _embed_query, setup_qdrant_client
+
+UPLOAD_BATCH_SIZE = 256
+EXACT_SEARCH_PARAMS = models.SearchParams(
+    exact=True, quantization=models.QuantizationSearchParams(ignore=True)
+)
+
+
+def sample_points(client, collection_name, count, seed):
+    points = []
+    offset = None
+    while len(points) < count:
+        records, offset = client.scroll(
+            collection_name=collection_name,
+            limit=min(1000, count - len(points)),
+            offset=offset,
+            with_payload=False,
+            with_vectors=True,
+        )
+        # Collections with sparse vectors return every vector by name; the
+        # dense one is unnamed.
+        points.extend(
+            (
+                record.id,
+                record.vector[""] if isinstance(record.vector, dict) else record.vector,
+            )
+            for record in records
+        )
+        if offset is None:
+            break
+
+    random.Random(seed).shuffle(points)
+    return points
+
+
+def build_collection(
+    client, collection_name, vector_params, points, m, ef_construct, quantization
+):
+    if client.collection_exists(collection_name=collection_name):
+        client.delete_collection(collection_name=collection_name)
+
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=models.VectorParams(
+            size=vector_params.size,
+            distance=vector_params.distance,
+            datatype=vector_params.datatype,
+        ),
+        # Index every segment, however small, so searches go through HNSW.
+        hnsw_config=models.HnswConfigDiff(
+            m=m, ef_construct=ef_construct, full_scan_threshold=1
+        ),
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1),
+        quantization_config=create_quantization_config(quantization),
+    )
+
+    for i in range(0, len(points), UPLOAD_BATCH_SIZE):
+        client.upsert(
+            collection_name=collection_name,
+            points=[
+                models.PointStruct(id=point_id, vector=vector)
+                for point_id, vector in points[i : i + UPLOAD_BATCH_SIZE]
+            ],
+            wait=True,
+        )
+
+    wait_for_collection(client, collection_name)
+
+
+def search(client, collection_name, query, k, search_params):
+    query_vector, exclude_id = query
+    result = client.query_points(
+        collection_name=collection_name,
+        query=query_vector,
+        limit=k + 1,
+        search_params=search_params,
+        with_payload=False,
+    ).points
+    return [point.id for point in result if point.id != exclude_id][:k]
+
+
+def run_queries(client, collection_name, queries, k, search_params, concurrency):
+    def timed_search(query):
+        start_time = time.perf_counter()
+        ids = search(client, collection_name, query, k, search_params)
+        return ids, time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_search, queries))
+    elapsed = time.perf_counter() - start_time
+
+    return [ids for ids, _ in results], [latency for _, latency in results], elapsed
+
+
+def recall(truth, results):
+    return statistics.mean(
+        len(set(expected) & set(found)) / len(expected)
+        for expected, found in zip(truth, results)
+        if expected
+    )
+
+
+def sweep(client, collection_name, label, queries, args):
+    truth = [
+        search(client, collection_name, query, args.k, EXACT_SEARCH_PARAMS)
+        for query in queries
+    ]
+
+    for hnsw_ef in args.ef:
+        search_params = models.SearchParams(
+            hnsw_ef=hnsw_ef,
+            quantization=models.QuantizationSearchParams(
+                rescore=True, oversampling=args.oversampling
+            ),
+        )
+
+        row = f"{label:<32} ef={hnsw_ef:<5}"
+        for concurrency in args.concurrency:
+            results, latencies, elapsed = run_queries(
+                client, collection_name, queries, args.k, search_params, concurrency
+            )
+            percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+            if concurrency == args.concurrency[0]:
+                row += f" recall@{args.k}={recall(truth, results):.3f}"
+            row += (
+                f" | c={concurrency} p50={percentiles[49] * 1000:.1f}ms"
+                f" p95={percentiles[94] * 1000:.1f}ms p99={percentiles[98] * 1000:.1f}ms"
+                f" qps={len(queries) / elapsed:.0f}"
+            )
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--queries-file", help="Text file with one query per line.")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument(
+        "--build",
+        action="store_true",
+        help="Also build sample collections for every m / ef_construct / quantization.",
+    )
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--ef-construct", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument(
+        "--quantization",
+        nargs="+",
+        choices=["none", "scalar", "binary"],
+        default=["none"],
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    client, collection_name = setup_qdrant_client()
+
+    sample_size = args.points if args.build else args.queries
+    points = sample_points(client, collection_name, sample_size, args.seed)
+    if len(points) <= args.k:
+        raise SystemExit(f"Need more than {args.k} points, found {len(points)}.")
+
+    if args.queries_file:
+        with open(args.queries_file) as f:
+            queries = [(_embed_query(line.strip()), None) for line in f if line.strip()]
+    else:
+        queries = [(vector, point_id) for point_id, vector in points[: args.queries]]
+
+    print(f"{len(queries)} queries, recall@{args.k} against exact search")
+    sweep(client, collection_name, collection_name, queries, args)
+
+    if not args.build:
+        return
+
+    vector_params = client.get_collection(collection_name).config.params.vectors
+    for quantization in args.quantization:
+        for m in args.m:
+            for ef_construct in args.ef_construct:
+                bench_name = f"{collection_name}_BENCH"
+                build_start = time.perf_counter()
+                build_collection(
+                    client,
+                    bench_name,
+                    vector_params,
+                    points,
+                    m,
+                    ef_construct,
+                    None if quantization == "none" else quantization,
+                )
+                label = f"m={m} ef_construct={ef_construct} {quantization}"
+                print(
+                    f"{label}: built {len(points)} points in {time.perf_counter() - build_start:.1f}s"
+                )
+                try:
+                    sweep(client, bench_name, label, queries, args)
+                finally:
+                    client.delete_collection(collection_name=bench_name)
+
+
+if __name__ == "__main__":
+    main()
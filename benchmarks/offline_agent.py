@@ -0,0 +1,148 @@
+"""Ingest and agent benchmark that runs without AWS or a Qdrant server.
+
+Bedrock is replaced by the offline stand-ins (hashed n-gram embeddings and
+the scripted chat model) and Qdrant runs embedded in memory, so runs are
+deterministic and free. PDFs are ingested first, then every question goes
+through the full agent graph: model call, search tool, model call.
+
+    uv run python -m benchmarks.offline_agent guide.pdf --questions 200 --concurrency 1 8
+    uv run python -m benchmarks.offline_agent guide.pdf --embedding-latency 0.05 \\
+        --chat-latency 0.5 --error-rate 0.01 --rounds 2
+
+Questions come from a text file with one question per line, or are the
+opening words of randomly picked chunks. With ``--rounds 2`` or more the
+same questions are asked again, which shows the effect of the caches.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+QUESTION_WORDS = 12
+
+
+def configure_environment(args):
+    # Settings are read when src.config is first imported.
+    os.environ["LUMEN_EMBEDDING_PROVIDER"] = "local"
+    os.environ["LUMEN_CHAT_PROVIDER"] = "scripted"
+    os.environ["LUMEN_QDRANT_PATH"] = ":memory:"
+    os.environ["LUMEN_CACHE_DIR"] = args.cache_dir or tempfile.mkdtemp(
+        prefix="lumen-bench-"
+    )
+    os.environ["LUMEN_OFFLINE_EMBEDDING_LATENCY_SECONDS"] = str(args.embedding_latency)
+    os.environ["LUMEN_OFFLINE_CHAT_LATENCY_SECONDS"] = str(args.chat_latency)
+    os.environ["LUMEN_OFFLINE_ERROR_RATE"] = str(args.error_rate)
+    os.environ["LUMEN_OFFLINE_SEED"] = str(args.seed)
+
+
+def sample_questions(count, seed):
+    from src.vector_store.qdrant_manager import setup_qdrant_client
+
+    client, collection_name = setup_qdrant_client()
+    records, _ = client.scroll(
+        collection_name=collection_name,
+        limit=10000,
+        with_payload=["page_content"],
+        with_vectors=False,
+    )
+    texts = [record.payload["page_content"] for record in records]
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(texts).split()[:QUESTION_WORDS]) for _ in range(count)]
+
+
+def ask(graph, question, thread_id):
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    start_time = time.perf_counter()
+    try:
+        state = graph.invoke(
+            {"messages": [HumanMessage(content=question)]},
+            config={"configurable": {"thread_id": thread_id, "model": "scripted"}},
+        )
+    except Exception:
+        return time.perf_counter() - start_time, None
+
+    tool_calls = sum(
+        len(message.tool_calls)
+        for message in state["messages"]
+        if isinstance(message, AIMessage)
+    )
+    return time.perf_counter() - start_time, tool_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdfs", nargs="+", help="PDF paths or URLs to ingest.")
+    parser.add_argument("--mode", choices=["fast", "regular"], default="fast")
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument(
+        "--questions-file", help="Text file with one question per line."
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--embedding-latency", type=float, default=0.0)
+    parser.add_argument("--chat-latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--cache-dir", help="Reuse caches from an earlier run.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    configure_environment(args)
+    # The agent logs every model response and tool result at debug level.
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    from src.agents.graph import aws_agent_graph
+    from src.vector_store.qdrant_manager import ingest_pdf
+
+    for pdf in args.pdfs:
+        result = ingest_pdf(pdf, mode=args.mode)
+        print(
+            f"Ingested {pdf}: {result['pages']} pages, {result['chunks']} chunks "
+            f"({result['embedded']} embedded) in {result['total_time']:.2f}s"
+        )
+
+    if args.questions_file:
+        with open(args.questions_file) as f:
+            questions = [line.strip() for line in f if line.strip()]
+    else:
+        questions = sample_questions(args.questions, args.seed)
+
+    for concurrency in args.concurrency:
+        for round_number in range(1, args.rounds + 1):
+            start_time = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(
+                    executor.map(
+                        ask,
+                        [aws_agent_graph] * len(questions),
+                        questions,
+                        [
+                            f"bench-{concurrency}-{round_number}-{i}"
+                            for i in range(len(questions))
+                        ],
+                    )
+                )
+            elapsed = time.perf_counter() - start_time
+
+            latencies = [latency for latency, _ in results]
+            tool_calls = [calls for _, calls in results if calls is not None]
+            percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+            print(
+                f"c={concurrency} round={round_number} "
+                f"p50={percentiles[49] * 1000:.1f}ms p95={percentiles[94] * 1000:.1f}ms "
+                f"p99={percentiles[98] * 1000:.1f}ms qps={len(questions) / elapsed:.1f} "
+                f"errors={len(results) - len(tool_calls)} "
+                f"tool_calls={sum(tool_calls)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+from typing import Any, List, Optional
+
+from langchain_aws import ChatBedrock
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from ..config import (
+    CHAT_PROVIDER,
+    OFFLINE_CHAT_LATENCY_SECONDS,
+    OFFLINE_ERROR_RATE,
+    OFFLINE_SEED,
+)
+from ..utils.clients import get_bedrock_runtime_client
+
+CHAT_PROVIDER_BEDROCK = "bedrock"
+CHAT_PROVIDER_SCRIPTED = "scripted"
+CHAT_PROVIDERS = (CHAT_PROVIDER_BEDROCK, CHAT_PROVIDER_SCRIPTED)
+SCRIPTED_ANSWER_CHARS = 500
+
+# Shared by all scripted models, since the graph creates one per call.
+_random = random.Random(OFFLINE_SEED)
+_random_lock = threading.Lock()
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Offline stand-in for Bedrock chat models that follows a fixed script.
+
+    For every user message it first calls the first bound tool
+    ``tool_rounds`` times with the message as the tool's first string
+    argument, then answers with the start of the last tool result. Every call
+    waits ``latency`` seconds and fails with a throttling error at
+    ``error_rate``.
+    """
+
+    model_id: str = CHAT_PROVIDER_SCRIPTED
+    tool_rounds: int = 1
+    latency: float = 0.0
+    error_rate: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(
+            tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        tools: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        with _random_lock:
+            failed = _random.random() < self.error_rate
+        if failed:
+            raise Exception(
+                "ThrottlingException: Too many requests, please wait before trying again."
+            )
+
+        # Only the turn since the latest user message counts.
+        turn_start = max(
+            (
+                i
+                for i, message in enumerate(messages)
+                if isinstance(message, HumanMessage)
+            ),
+            default=0,
+        )
+        turn = messages[turn_start:]
+        question = str(turn[0].content) if turn else ""
+        rounds = sum(
+            1
+            for message in turn
+            if isinstance(message, AIMessage) and message.tool_calls
+        )
+
+        if tools and rounds < self.tool_rounds:
+            function = tools[0]["function"]
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": function["name"],
+                        "args": {_get_text_argument(function): question},
+                        "id": f"scripted-{len(messages)}",
+                    }
+                ],
+            )
+        else:
+            tool_results = [
+                str(message.content)
+                for message in turn
+                if isinstance(message, ToolMessage)
+            ]
+            answer = f"Scripted answer to: {question}"
+            if tool_results:
+                answer += f"\n\n{tool_results[-1][:SCRIPTED_ANSWER_CHARS]}"
+            message = AIMessage(content=answer)
+
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _get_text_argument(function):
+    parameters = function.get("parameters", {})
+    properties = parameters.get("properties", {})
+    for name in parameters.get("required", []):
+        if properties.get(name, {}).get("type") == "string":
+            return name
+    return "query"
+
+
+def create_chat_model(model_id: str, **bedrock_kwargs) -> BaseChatModel:
+    """Return the chat model for ``model_id`` from the configured provider.
+
+    ``bedrock_kwargs`` go to ``ChatBedrock`` and are ignored by the scripted
+    stand-in.
+    """
+    if CHAT_PROVIDER == CHAT_PROVIDER_SCRIPTED:
+        return ScriptedChatModel(
+            model_id=model_id,
+            latency=OFFLINE_CHAT_LATENCY_SECONDS,
+            error_rate=OFFLINE_ERROR_RATE,
+        )
+    if CHAT_PROVIDER == CHAT_PROVIDER_BEDROCK:
+        return ChatBedrock(
+            model_id=model_id,
+            client=get_bedrock_runtime_client(),
+            **bedrock_kwargs,
+        )
+    raise ValueError(
+        f"Unsupported chat provider {CHAT_PROVIDER!r}, expected one of {CHAT_PROVIDERS}."
+    )
@@ -1,10 +1,10 @@
 from langgraph.graph import StateGraph, END
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import BaseMessage, ToolMessage, AIMessage, SystemMessage
-from langchain_aws import ChatBedrock
 from langgraph.checkpoint.memory import InMemorySaver
 from loguru import logger
 
+from .chat_models import create_chat_model
 from .state import AgentState
 from .tools.qdrant import search_local_aws_docs
 
@@ -30,9 +30,7 @@ def call_model(state: AgentState, config: RunnableConfig):
     model_id = config.get("configurable", {}).get("model", "amazon.nova-micro-v1:0")
     logger.info(f"Using model: {model_id}")
 
-    model = ChatBedrock(
-        model_id=model_id,
-    )
+    model = create_chat_model(model_id)
     model_with_tools = model.bind_tools([search_local_aws_docs])
 
     system_prompt = """You are an expert AWS assistant. Your goal is to answer user questions about AWS services accurately.
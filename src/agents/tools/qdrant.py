@@ -1,65 +1,120 @@
 from langchain_core.tools import tool
+from ...config import SEARCH_HNSW_EF
+from ...vector_store.chunk import estimate_tokens
 from ...vector_store.qdrant_manager import (
-    search_vectors,
+    RETRIEVAL_MODE_AUTO,
+    RETRIEVAL_MODE_PARENT,
+    search_vectors_batch,
 )
 from langchain_core.documents import Document
-from typing import List
+from typing import List, Optional
 import re
 from loguru import logger
 
 MAX_CHARS_PER_RESULT = 10000
-MAX_TOTAL_CHARS = 50000
+MAX_TOTAL_TOKENS = 8000
+MAX_SUB_QUERIES = 5
+
+
+def _format_result(number, doc):
+    page_content = doc.page_content.strip()
+    headers = " -> ".join(
+        [
+            str(doc.metadata.get(key)).strip()
+            for key in sorted(
+                [k for k in doc.metadata if re.match(r"Header \d+", k)],
+                key=lambda x: int(x.split(" ")[1]),
+            )
+            if doc.metadata.get(key)
+        ]
+    )
+
+    metadata_info = (
+        f"(Source: {doc.metadata.get('Document title', 'N/A')}, Heading(s): {headers})"
+    )
+
+    # Truncate individual result if too long
+    truncated_content = page_content[:MAX_CHARS_PER_RESULT]
+    if len(page_content) > MAX_CHARS_PER_RESULT:
+        truncated_content += "..."
+
+    return f"Result {number}:\n{truncated_content}\n{metadata_info}\n\n"
 
 
 @tool
-def search_local_aws_docs(query: str, num_results: int = 5) -> str:
+def search_local_aws_docs(
+    query: str,
+    num_results: int = 5,
+    expand_context: bool = False,
+    hnsw_ef: Optional[int] = None,
+    document_title: Optional[str] = None,
+    service: Optional[str] = None,
+    headings: Optional[List[str]] = None,
+    sub_queries: Optional[List[str]] = None,
+) -> str:
     """
     Searches the locally stored and vectorized AWS documentation PDFs for relevant information based on the user's query.
     Use this tool when the user asks questions about AWS services, features, or procedures that might be found in the ingested PDF documents.
     You can provide the user's specific question as the 'query' either raw or optimized if you think it will improve the search results.
+    If the question has several parts, or you want to try a few phrasings, pass up to 5 extra searches as 'sub_queries' instead of calling the tool several times; they all run at once and results are listed per query.
     You can optionally specify 'num_results' (default is 5) for the number of search results to retrieve.
+    Results are short snippets. Set 'expand_context' to true to get the full documentation section around every snippet instead, e.g. when the snippets are too short to answer the question.
+    'hnsw_ef' (optional) sets how thoroughly the index is searched; higher values such as 256 find more of the best matches but are slower. Leave it unset unless the results look incomplete.
+    To search only part of the documentation, set 'service' to an AWS service name such as "Lambda" (only guides with it in their title are searched), 'document_title' to the exact 'Source' of an earlier result, or 'headings' to headings from an earlier result's 'Heading(s)' (only sections under all of them are searched). Use these when the question is clearly about one service or section.
     """
     logger.debug("--- Executing Qdrant Search Tool ---")
-    logger.debug(f"Query: {query}, Limit: {num_results}")
+    logger.debug(
+        f"Query: {query}, Sub-queries: {sub_queries}, Limit: {num_results}, Expand context: {expand_context}, HNSW ef: {hnsw_ef}, "
+        f"Document title: {document_title}, Service: {service}, Headings: {headings}"
+    )
+    queries = list(dict.fromkeys([query, *(sub_queries or [])[:MAX_SUB_QUERIES]]))
     try:
-        found_docs: List[Document] = search_vectors(query_text=query, limit=num_results)
+        found_docs_per_query: List[List[Document]] = search_vectors_batch(
+            queries,
+            limit=num_results,
+            retrieval_mode=RETRIEVAL_MODE_PARENT
+            if expand_context
+            else RETRIEVAL_MODE_AUTO,
+            hnsw_ef=hnsw_ef or SEARCH_HNSW_EF,
+            document_titles=[document_title] if document_title else None,
+            service=service,
+            header_path=headings,
+        )
 
-        if not found_docs:
+        if not any(found_docs_per_query):
             return "No relevant documents found in the local AWS documentation store."
 
         results_str = "Found the following relevant snippets from local AWS docs:\n\n"
-        total_chars = len(results_str)
-
-        for i, doc in enumerate(found_docs):
-            page_content = doc.page_content.strip()
-            headers = " -> ".join(
-                [
-                    str(doc.metadata.get(key)).strip()
-                    for key in sorted(
-                        [k for k in doc.metadata if re.match(r"Header \d+", k)],
-                        key=lambda x: int(x.split(" ")[1]),
-                    )
-                    if doc.metadata.get(key)
-                ]
-            )
-
-            metadata_info = f"(Source: {doc.metadata.get('Document title', 'N/A')}, Heading(s): {headers})"
+        # Every query gets an equal share of the output budget.
+        query_token_budget = (MAX_TOTAL_TOKENS - estimate_tokens(results_str)) // len(
+            queries
+        )
+        seen_contents = set()
+        result_number = 0
 
-            # Truncate individual result if too long
-            truncated_content = page_content[:MAX_CHARS_PER_RESULT]
-            if len(page_content) > MAX_CHARS_PER_RESULT:
-                truncated_content += "..."
+        for query_text, found_docs in zip(queries, found_docs_per_query):
+            if len(queries) > 1:
+                results_str += f'Results for "{query_text}":\n\n'
+            query_tokens = 0
 
-            entry = f"Result {i + 1}:\n{truncated_content}\n{metadata_info}\n\n"
+            # Overlapping queries often find the same chunks.
+            new_docs = [
+                doc for doc in found_docs if doc.page_content not in seen_contents
+            ]
+            if not new_docs:
+                results_str += "No results beyond those listed above.\n\n"
 
-            if total_chars + len(entry) > MAX_TOTAL_CHARS:
-                results_str += (
-                    "--- More results available but truncated due to length limit ---"
-                )
-                break
+            for doc in new_docs:
+                entry = _format_result(result_number + 1, doc)
+                entry_tokens = estimate_tokens(entry)
+                if query_tokens + entry_tokens > query_token_budget:
+                    results_str += "--- More results available but truncated due to length limit ---\n\n"
+                    break
 
-            results_str += entry
-            total_chars += len(entry)
+                seen_contents.add(doc.page_content)
+                result_number += 1
+                results_str += entry
+                query_tokens += entry_tokens
 
         logger.debug(f"--- Qdrant Search Tool Results ---\n{results_str}")
         return results_str.strip()
@@ -0,0 +1,243 @@
+"""Bulk-ingest a PDF, a directory of PDFs or a file of URLs.
+
+    uv run python -m src.cli.ingest path/to/pdfs --workers 4
+    uv run python -m src.cli.ingest urls.txt --mode regular --profile fast
+
+Every document is trimmed of its table of contents and document history and
+ingested in a pool of worker processes. Results are recorded in a JSON
+manifest after each document, so running the same command again skips the
+local PDFs that were already ingested and retries the ones that failed. URLs
+are downloaded again only if they changed, and skipped if their content was
+already ingested.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from ..config import DOCLING_PROFILE, INGEST_MANIFEST_PATH, INGEST_WORKERS
+from ..utils.download import is_url
+from ..vector_store.ingest_jobs import ingest_source
+
+
+def list_sources(source):
+    """Return the PDFs under a directory, a single PDF, or the URLs in a text file."""
+    if os.path.isdir(source):
+        return sorted(
+            os.path.abspath(os.path.join(root, name))
+            for root, _, names in os.walk(source)
+            for name in names
+            if name.lower().endswith(".pdf")
+        )
+
+    if source.lower().endswith(".pdf"):
+        return [os.path.abspath(source)]
+
+    with open(source, "rb") as f:
+        content = f.read()
+    if content.startswith(b"%PDF-"):
+        return [os.path.abspath(source)]
+
+    try:
+        lines = content.decode("utf-8").splitlines()
+    except UnicodeDecodeError:
+        raise ValueError(f"{source} is neither a PDF nor a text file of URLs")
+
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            urls.append(line.split("#")[0].strip())
+    return urls
+
+
+def get_source_fingerprint(source):
+    """Return the size and mtime of a local PDF, or None for a URL.
+
+    URLs are always handed to a worker: its conditional download notices a
+    republished PDF, and an unchanged one is skipped before parsing.
+    """
+    if is_url(source):
+        return None
+    stat = os.stat(source)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class IngestManifest:
+    """Per-document ingestion results, saved to a JSON file after every update."""
+
+    def __init__(self, path):
+        self.path = path
+        self.documents = {}
+
+        if os.path.exists(path):
+            with open(path) as f:
+                self.documents = json.load(f).get("documents", {})
+
+    def is_done(self, source, fingerprint):
+        entry = self.documents.get(source)
+        return (
+            fingerprint is not None
+            and entry is not None
+            and entry["status"] == "done"
+            and entry["fingerprint"] == fingerprint
+        )
+
+    def record(self, source, **entry):
+        self.documents[source] = entry
+        self.save()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Write a temporary file and rename it, so an interrupted run never
+        # leaves a truncated manifest behind.
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump({"documents": self.documents}, f, indent=2)
+        os.replace(temporary_path, self.path)
+
+
+class LogStatus:
+    """Stands in for a Streamlit status container and logs its messages."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def write(self, message):
+        logger.info(f"{self.name}: {message}")
+
+
+def ingest_document(source, mode, docling_profile):
+    return ingest_source(
+        source,
+        LogStatus(os.path.basename(urlparse(source).path)),
+        mode=mode,
+        docling_profile=docling_profile,
+    )
+
+
+def run_bulk_ingest(sources, manifest, workers, mode, docling_profile):
+    totals = {"done": 0, "failed": 0, "pages": 0, "chunks": 0, "embedded": 0}
+
+    pending = []
+    for source in sources:
+        fingerprint = get_source_fingerprint(source)
+        if manifest.is_done(source, fingerprint):
+            continue
+        pending.append((source, fingerprint))
+
+    logger.info(
+        f"{len(pending)} documents to ingest, {len(sources) - len(pending)} already done."
+    )
+    if not pending:
+        return totals
+
+    start_time = time.perf_counter()
+
+    # Spawned workers are safe next to the threads that ingestion starts.
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(pending)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        futures = {
+            executor.submit(ingest_document, source, mode, docling_profile): (
+                source,
+                fingerprint,
+            )
+            for source, fingerprint in pending
+        }
+
+        try:
+            for future in as_completed(futures):
+                source, fingerprint = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to ingest {source}: {e}")
+                    manifest.record(
+                        source, status="failed", fingerprint=fingerprint, error=str(e)
+                    )
+                    totals["failed"] += 1
+                    continue
+
+                manifest.record(
+                    source, status="done", fingerprint=fingerprint, **result
+                )
+                totals["done"] += 1
+                for key in ("pages", "chunks", "embedded"):
+                    totals[key] += result[key]
+
+                logger.info(
+                    f"[{totals['done'] + totals['failed']}/{len(pending)}] Ingested {source}: "
+                    f"{result['pages']} pages, {result['chunks']} chunks, {result['embedded']} new vectors in {result['total_time']:.1f} seconds."
+                )
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            logger.warning("Interrupted. Run the same command again to resume.")
+            raise
+
+    elapsed = time.perf_counter() - start_time
+    totals["elapsed"] = elapsed
+    logger.info(
+        f"Ingested {totals['done']} documents ({totals['failed']} failed) in {elapsed:.1f} seconds: "
+        f"{totals['pages'] / elapsed:.2f} pages/s, "
+        f"{totals['chunks'] / elapsed:.2f} chunks/s, "
+        f"{totals['embedded'] / elapsed:.2f} vectors/s."
+    )
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Bulk-ingest a PDF, a directory of PDFs or a file of URLs."
+    )
+    parser.add_argument(
+        "source",
+        help="A PDF, a directory of PDFs, or a text file with one PDF URL per line.",
+    )
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument("--mode", choices=["fast", "regular"], default="fast")
+    parser.add_argument(
+        "--profile",
+        choices=["balanced", "accurate", "fast"],
+        default=DOCLING_PROFILE,
+        help="Docling profile for regular mode.",
+    )
+    parser.add_argument("--manifest", default=INGEST_MANIFEST_PATH)
+    args = parser.parse_args(argv)
+
+    # Split the CPUs between documents instead of letting every worker start
+    # a full-size page parser pool. Spawned workers inherit the environment.
+    os.environ.setdefault(
+        "LUMEN_PARSER_WORKERS", str(max(1, (os.cpu_count() or 1) // args.workers))
+    )
+
+    try:
+        sources = list_sources(args.source)
+    except ValueError as e:
+        parser.error(str(e))
+    manifest = IngestManifest(args.manifest)
+
+    try:
+        totals = run_bulk_ingest(
+            sources, manifest, args.workers, args.mode, args.profile
+        )
+    except KeyboardInterrupt:
+        return 130
+
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
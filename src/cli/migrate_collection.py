@@ -0,0 +1,177 @@
+"""Move an existing collection to another collection profile.
+
+    uv run python -m src.cli.migrate_collection --profile scalar
+    uv run python -m src.cli.migrate_collection --profile memory --dimensions 256
+
+The collection is updated in place and Qdrant rebuilds its segments in the
+background. Search latency is measured before and after with stored vectors
+as queries, and the estimated vector memory of both profiles is reported.
+Set LUMEN_COLLECTION_PROFILE to the same profile afterwards, so that new
+collections are created with it and searches use its rescoring parameters.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+from loguru import logger
+
+from ..config import EMBEDDING_DIMENSIONS, EMBEDDING_TYPE
+from ..utils.clients import get_qdrant_client
+from ..vector_store.collection_profiles import (
+    COLLECTION_PROFILES,
+    estimate_vector_memory_bytes,
+    get_search_params,
+    migrate_collection,
+)
+from ..vector_store.qdrant_manager import get_collection_config, get_collection_name
+
+SEARCH_LIMIT = 10
+
+
+def detect_collection_profile(info):
+    """Return the profile matching a collection's current config, if any."""
+    vectors = info.config.params.vectors
+    quantization = info.config.quantization_config
+    if quantization is None:
+        quantization_kind = None
+    elif getattr(quantization, "scalar", None) is not None:
+        quantization_kind = "scalar"
+    elif getattr(quantization, "binary", None) is not None:
+        quantization_kind = "binary"
+    else:
+        quantization_kind = "other"
+
+    for profile, settings in COLLECTION_PROFILES.items():
+        if (
+            settings["quantization"] == quantization_kind
+            and settings["on_disk"] == bool(vectors.on_disk)
+            and settings["on_disk_payload"] == bool(info.config.params.on_disk_payload)
+        ):
+            return profile
+    return None
+
+
+def sample_query_vectors(client, collection_name, count):
+    records, _ = client.scroll(
+        collection_name=collection_name,
+        limit=count,
+        with_payload=False,
+        with_vectors=True,
+    )
+    # Collections with sparse vectors return every vector by name; the dense
+    # one is unnamed.
+    return [
+        record.vector[""] if isinstance(record.vector, dict) else record.vector
+        for record in records
+    ]
+
+
+def measure_search_latency(client, collection_name, query_vectors, search_params):
+    latencies = []
+    for vector in query_vectors:
+        start_time = time.perf_counter()
+        client.query_points(
+            collection_name=collection_name,
+            query=vector,
+            limit=SEARCH_LIMIT,
+            search_params=search_params,
+            with_payload=False,
+        )
+        latencies.append(time.perf_counter() - start_time)
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {"p50": percentiles[49], "p99": percentiles[98]}
+
+
+def describe(label, profile, points, dimensions, embedding_type, latency):
+    if profile is None:
+        memory = "custom profile, vector memory unknown"
+    else:
+        memory_bytes = estimate_vector_memory_bytes(
+            points, dimensions, embedding_type, profile
+        )
+        memory = (
+            f"profile {profile}, ~{memory_bytes / 1024 / 1024:.1f} MB of vectors in RAM"
+        )
+
+    logger.info(
+        f"{label}: {memory}, search p50 {latency['p50'] * 1000:.1f} ms, p99 {latency['p99'] * 1000:.1f} ms"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Move an existing collection to another collection profile."
+    )
+    parser.add_argument("--profile", choices=list(COLLECTION_PROFILES), required=True)
+    parser.add_argument("--dimensions", type=int, default=EMBEDDING_DIMENSIONS)
+    parser.add_argument(
+        "--embedding-type", choices=["float", "binary"], default=EMBEDDING_TYPE
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=200,
+        help="Stored vectors to search with when measuring latency.",
+    )
+    args = parser.parse_args(argv)
+
+    # Rejects profiles that do not fit the embedding settings.
+    get_collection_config(args.dimensions, args.embedding_type, args.profile)
+
+    client = get_qdrant_client()
+    collection_name = get_collection_name(args.dimensions, args.embedding_type)
+    if not client.collection_exists(collection_name=collection_name):
+        logger.error(f"Collection {collection_name} does not exist.")
+        return 1
+
+    info = client.get_collection(collection_name)
+    current_profile = detect_collection_profile(info)
+    if current_profile == args.profile:
+        logger.info(f"{collection_name} already uses the {args.profile!r} profile.")
+        return 0
+
+    query_vectors = sample_query_vectors(client, collection_name, args.queries)
+    if len(query_vectors) < 2:
+        logger.error(f"{collection_name} needs at least 2 points to measure latency.")
+        return 1
+
+    before_latency = measure_search_latency(
+        client,
+        collection_name,
+        query_vectors,
+        get_search_params(current_profile) if current_profile else None,
+    )
+    describe(
+        "Before",
+        current_profile,
+        info.points_count,
+        args.dimensions,
+        args.embedding_type,
+        before_latency,
+    )
+
+    migrate_collection(client, collection_name, args.profile)
+
+    after_latency = measure_search_latency(
+        client, collection_name, query_vectors, get_search_params(args.profile)
+    )
+    describe(
+        "After",
+        args.profile,
+        info.points_count,
+        args.dimensions,
+        args.embedding_type,
+        after_latency,
+    )
+
+    logger.info(
+        f"Set LUMEN_COLLECTION_PROFILE={args.profile} so new collections and searches use the same profile."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
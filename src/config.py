@@ -0,0 +1,100 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_DIR = os.getenv("LUMEN_CACHE_DIR", ".lumen_cache")
+
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v2:0"
+# Titan Text Embeddings V2 outputs 256, 512 or 1024 dimensions, as float or
+# binary vectors. Every combination is stored in its own Qdrant collection.
+EMBEDDING_DIMENSIONS = int(os.getenv("LUMEN_EMBEDDING_DIMENSIONS", "1024"))
+EMBEDDING_TYPE = os.getenv("LUMEN_EMBEDDING_TYPE", "float")
+
+# "bedrock", or "local" and "scripted" for offline stand-ins that need no
+# AWS access; see src/vector_store/local_embeddings.py and
+# src/agents/chat_models.py.
+EMBEDDING_PROVIDER = os.getenv("LUMEN_EMBEDDING_PROVIDER", "bedrock")
+CHAT_PROVIDER = os.getenv("LUMEN_CHAT_PROVIDER", "bedrock")
+OFFLINE_EMBEDDING_LATENCY_SECONDS = float(
+    os.getenv("LUMEN_OFFLINE_EMBEDDING_LATENCY_SECONDS", "0")
+)
+OFFLINE_CHAT_LATENCY_SECONDS = float(
+    os.getenv("LUMEN_OFFLINE_CHAT_LATENCY_SECONDS", "0")
+)
+# Share of stand-in calls that fail with a throttling error.
+OFFLINE_ERROR_RATE = float(os.getenv("LUMEN_OFFLINE_ERROR_RATE", "0"))
+OFFLINE_SEED = int(os.getenv("LUMEN_OFFLINE_SEED", "0"))
+
+EMBEDDING_CACHE_PATH = os.path.join(CACHE_DIR, "embeddings.sqlite3")
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("LUMEN_EMBEDDING_CACHE_MAX_MB", "1024"))
+
+# Concurrent Bedrock requests per process, each embedding one text.
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("LUMEN_EMBEDDING_MAX_CONCURRENCY", "16"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("LUMEN_EMBEDDING_MAX_RETRIES", "6"))
+
+PIPELINE_QUEUE_SIZE = int(os.getenv("LUMEN_PIPELINE_QUEUE_SIZE", "4"))
+PIPELINE_PAGES_PER_SECTION = int(os.getenv("LUMEN_PIPELINE_PAGES_PER_SECTION", "20"))
+PIPELINE_EMBED_BATCH_SIZE = int(os.getenv("LUMEN_PIPELINE_EMBED_BATCH_SIZE", "128"))
+# Batches being embedded at once, so requests keep flowing between batches.
+PIPELINE_EMBED_BATCHES_IN_FLIGHT = int(
+    os.getenv("LUMEN_PIPELINE_EMBED_BATCHES_IN_FLIGHT", "4")
+)
+
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+# ":memory:" or a directory runs Qdrant embedded in the process instead of
+# connecting to QDRANT_HOST. Embedded Qdrant serves a single process.
+QDRANT_PATH = os.getenv("LUMEN_QDRANT_PATH")
+# memory, scalar, binary or disk; see src/vector_store/collection_profiles.py.
+COLLECTION_PROFILE = os.getenv("LUMEN_COLLECTION_PROFILE", "memory")
+# HNSW candidate list size for searches; unset uses the collection default.
+SEARCH_HNSW_EF = (
+    int(os.environ["LUMEN_SEARCH_HNSW_EF"])
+    if os.getenv("LUMEN_SEARCH_HNSW_EF")
+    else None
+)
+# Fuse dense and BM25 sparse matches; collections created before sparse
+# vectors existed always use dense search only.
+SEARCH_HYBRID = os.getenv("LUMEN_SEARCH_HYBRID", "true").lower() == "true"
+
+BEDROCK_MAX_POOL_CONNECTIONS = int(
+    os.getenv("LUMEN_BEDROCK_MAX_POOL_CONNECTIONS", "32")
+)
+
+UPSERT_BATCH_SIZE = int(os.getenv("LUMEN_UPSERT_BATCH_SIZE", "64"))
+UPSERT_PARALLELISM = int(os.getenv("LUMEN_UPSERT_PARALLELISM", "4"))
+UPSERT_WAIT = os.getenv("LUMEN_UPSERT_WAIT", "false").lower() == "true"
+
+PARSER_WORKERS = int(os.getenv("LUMEN_PARSER_WORKERS", str(os.cpu_count() or 1)))
+# Spawning workers costs seconds (each imports pymupdf4llm and reopens the PDF)
+# while a page converts in ~0.06-0.13s, so a 60-page document parsed slower in
+# parallel (6.2s) than serially (3.6s); break-even is past ~150 pages.
+PARSER_PARALLEL_MIN_PAGES = int(os.getenv("LUMEN_PARSER_PARALLEL_MIN_PAGES", "200"))
+
+DOCLING_DEVICE = os.getenv("LUMEN_DOCLING_DEVICE", "auto")
+DOCLING_NUM_THREADS = int(
+    os.getenv("LUMEN_DOCLING_NUM_THREADS", str(os.cpu_count() or 4))
+)
+DOCLING_PROFILE = os.getenv("LUMEN_DOCLING_PROFILE", "balanced")
+
+INGEST_WORKERS = int(os.getenv("LUMEN_INGEST_WORKERS", "2"))
+INGEST_MANIFEST_PATH = os.path.join(CACHE_DIR, "ingest_manifest.json")
+
+INGEST_JOB_CONCURRENCY = int(os.getenv("LUMEN_INGEST_JOB_CONCURRENCY", "2"))
+INGEST_JOBS_PATH = os.path.join(CACHE_DIR, "ingest_jobs.sqlite3")
+INGEST_JOBS_DIR = os.path.join(CACHE_DIR, "ingest_jobs")
+
+DOWNLOAD_CACHE_DIR = os.path.join(CACHE_DIR, "downloads")
+DOWNLOAD_CACHE_MAX_MB = int(os.getenv("LUMEN_DOWNLOAD_CACHE_MAX_MB", "2048"))
+DOWNLOAD_POOL_SIZE = int(os.getenv("LUMEN_DOWNLOAD_POOL_SIZE", "8"))
+DOWNLOAD_TIMEOUT_SECONDS = int(os.getenv("LUMEN_DOWNLOAD_TIMEOUT_SECONDS", "60"))
+
+MARKDOWN_CACHE_PATH = os.path.join(CACHE_DIR, "markdown.sqlite3")
+MARKDOWN_CACHE_MAX_MB = int(os.getenv("LUMEN_MARKDOWN_CACHE_MAX_MB", "512"))
+
+QUERY_CACHE_VERSIONS_PATH = os.path.join(CACHE_DIR, "collection_versions.sqlite3")
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("LUMEN_QUERY_CACHE_MAX_ENTRIES", "1024"))
+QUERY_CACHE_TTL_SECONDS = int(os.getenv("LUMEN_QUERY_CACHE_TTL_SECONDS", "3600"))
@@ -4,7 +4,6 @@ from langchain_core.messages import (
     ToolMessage,
     SystemMessage,
 )
-from langchain_aws import ChatBedrock
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from langgraph.prebuilt import create_react_agent
 from typing import List, Dict, Any, Optional
@@ -12,6 +11,8 @@ from loguru import logger
 import traceback
 import re
 
+from ..agents.chat_models import create_chat_model
+
 
 class MCPChatClient:
     def __init__(self):
@@ -33,8 +34,8 @@ class MCPChatClient:
 
     def _initialize_model(self, model_id: str = "amazon.nova-pro-v1:0"):
         logger.info(f"Initializing model: {model_id}")
-        self.model = ChatBedrock(
-            model_id=model_id,
+        self.model = create_chat_model(
+            model_id,
             streaming=True,
             model_kwargs={"temperature": 0.7},
         )
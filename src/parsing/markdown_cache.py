@@ -0,0 +1,245 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from ..config import MARKDOWN_CACHE_MAX_MB, MARKDOWN_CACHE_PATH
+
+EVICTION_TARGET_RATIO = 0.9
+SQLITE_BUSY_TIMEOUT_SECONDS = 30
+
+
+class MarkdownCache:
+    """SQLite-backed cache of parsed markdown keyed by (PDF content hash, parser id).
+
+    Markdown is stored as zlib-compressed JSON lists of sections, so a cached
+    parse streams into chunking exactly like a fresh one. The markdown of each
+    page from a document's last parse is also kept, keyed by page fingerprint,
+    so a revised PDF only needs its changed pages converted. When the
+    compressed size grows past ``max_bytes`` the least recently used entries
+    are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(
+            path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS markdown (
+                content_hash TEXT NOT NULL,
+                parser_id TEXT NOT NULL,
+                sections BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (content_hash, parser_id)
+            ) WITHOUT ROWID
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS markdown_last_used ON markdown (last_used)"
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                document_id TEXT NOT NULL,
+                parser_id TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                markdown BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (document_id, parser_id, fingerprint)
+            ) WITHOUT ROWID
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)"
+        )
+        self._connection.commit()
+
+    def get(self, content_hash: str, parser_id: str) -> Optional[List[str]]:
+        with self._lock:
+            row = self._connection.execute(
+                """
+                SELECT sections FROM markdown
+                WHERE content_hash = ? AND parser_id = ?
+                """,
+                (content_hash, parser_id),
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._connection.execute(
+                """
+                UPDATE markdown SET last_used = ?
+                WHERE content_hash = ? AND parser_id = ?
+                """,
+                (time.time(), content_hash, parser_id),
+            )
+            self._connection.commit()
+            self.hits += 1
+
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def put(self, content_hash: str, parser_id: str, sections: List[str]):
+        blob = zlib.compress(json.dumps(sections).encode("utf-8"))
+
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO markdown
+                (content_hash, parser_id, sections, last_used)
+                VALUES (?, ?, ?, ?)
+                """,
+                (content_hash, parser_id, blob, time.time()),
+            )
+            self._connection.commit()
+            self._evict()
+
+    def get_pages(self, document_id: str, parser_id: str) -> Dict[str, str]:
+        """Return ``{fingerprint: markdown}`` for the pages of a document's last parse."""
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT fingerprint, markdown FROM pages
+                WHERE document_id = ? AND parser_id = ?
+                """,
+                (document_id, parser_id),
+            ).fetchall()
+
+        return {
+            fingerprint: zlib.decompress(markdown).decode("utf-8")
+            for fingerprint, markdown in rows
+        }
+
+    def put_pages(self, document_id: str, parser_id: str, pages: Dict[str, str]):
+        """Replace the stored pages of a document with ``{fingerprint: markdown}``."""
+        now = time.time()
+        rows = [
+            (
+                document_id,
+                parser_id,
+                fingerprint,
+                zlib.compress(markdown.encode("utf-8")),
+                now,
+            )
+            for fingerprint, markdown in pages.items()
+        ]
+
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM pages WHERE document_id = ? AND parser_id = ?",
+                (document_id, parser_id),
+            )
+            self._connection.executemany(
+                """
+                INSERT INTO pages
+                (document_id, parser_id, fingerprint, markdown, last_used)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            self._connection.commit()
+            self._evict()
+
+    def _size_bytes(self) -> int:
+        return self._connection.execute(
+            """
+            SELECT
+                (SELECT COALESCE(SUM(LENGTH(sections)), 0) FROM markdown)
+                + (SELECT COALESCE(SUM(LENGTH(markdown)), 0) FROM pages)
+            """
+        ).fetchone()[0]
+
+    def _evict(self):
+        size_bytes = self._size_bytes()
+        if size_bytes <= self.max_bytes:
+            return
+
+        target_bytes = int(self.max_bytes * EVICTION_TARGET_RATIO)
+        rows = self._connection.execute(
+            """
+            SELECT 'markdown', content_hash, parser_id, '', LENGTH(sections), last_used
+            FROM markdown
+            UNION ALL
+            SELECT 'pages', document_id, parser_id, fingerprint, LENGTH(markdown), last_used
+            FROM pages
+            ORDER BY last_used
+            """
+        ).fetchall()
+
+        evicted = {"markdown": [], "pages": []}
+        for table, key, parser_id, fingerprint, length, _ in rows:
+            if size_bytes <= target_bytes:
+                break
+            if table == "markdown":
+                evicted["markdown"].append((key, parser_id))
+            else:
+                evicted["pages"].append((key, parser_id, fingerprint))
+            size_bytes -= length
+
+        self._connection.executemany(
+            "DELETE FROM markdown WHERE content_hash = ? AND parser_id = ?",
+            evicted["markdown"],
+        )
+        self._connection.executemany(
+            """
+            DELETE FROM pages
+            WHERE document_id = ? AND parser_id = ? AND fingerprint = ?
+            """,
+            evicted["pages"],
+        )
+        self._connection.commit()
+        logger.info(
+            f"Evicted {len(evicted['markdown'])} parses and {len(evicted['pages'])} pages from the markdown cache."
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connection.execute(
+                "SELECT COUNT(*) FROM markdown"
+            ).fetchone()[0]
+            pages = self._connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            size_bytes = self._size_bytes()
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "pages": pages,
+            "size_bytes": size_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_markdown_cache = None
+_markdown_cache_lock = threading.Lock()
+
+
+def get_markdown_cache() -> MarkdownCache:
+    global _markdown_cache
+    with _markdown_cache_lock:
+        if _markdown_cache is None:
+            _markdown_cache = MarkdownCache(
+                MARKDOWN_CACHE_PATH, MARKDOWN_CACHE_MAX_MB * 1024 * 1024
+            )
+        return _markdown_cache
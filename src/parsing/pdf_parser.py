@@ -1,49 +1,293 @@
+import hashlib
+import importlib.metadata
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import pymupdf
 import pymupdf4llm
 from loguru import logger
-from ..utils.pdf import get_pdf_toc
+from ..config import (
+    DOCLING_DEVICE,
+    DOCLING_NUM_THREADS,
+    DOCLING_PROFILE,
+    PARSER_PARALLEL_MIN_PAGES,
+    PARSER_WORKERS,
+    PIPELINE_PAGES_PER_SECTION,
+)
+from ..utils.pdf import analyze_pdf_pages, get_page_fingerprints, open_prepared_pdf
 from ..utils.md import adjust_markdown_headings
 
 
-def convert_pdf_to_markdown_document_docling(source_location):
-    from docling.document_converter import DocumentConverter, PdfFormatOption
-    from docling.datamodel.pipeline_options import (
-        PdfPipelineOptions,
-        AcceleratorDevice,
-        AcceleratorOptions,
-        TableFormerMode,
-    )
-    from docling.datamodel.base_models import InputFormat
-    from docling.datamodel.settings import settings
+_docling_converters = {}
+_docling_converters_lock = threading.Lock()
+# Docling's PDF backends are not thread-safe, so conversions are serialized.
+_docling_convert_lock = threading.Lock()
+
+
+# Per-profile pipeline settings. "ocr" is "always", "never" or "auto" (only
+# pages without a text layer); "tables" is the TableFormer mode, used only on
+# runs of pages that contain tables unless "all_pages" is set.
+DOCLING_PROFILES = {
+    "fast": {"ocr": "never", "tables": "fast", "all_pages": False},
+    "balanced": {"ocr": "auto", "tables": "accurate", "all_pages": False},
+    "accurate": {"ocr": "always", "tables": "accurate", "all_pages": True},
+}
+
+
+# Bump when a change here alters the markdown either parser produces, so
+# cached parses from the previous version are not reused.
+PARSER_OUTPUT_VERSION = 3
+
+DOCLING_PAGE_BREAK = "<!-- lumen page break -->"
+
+
+def get_parser_id(mode, docling_profile=DOCLING_PROFILE):
+    """Identify the parser, its version and settings for a processing mode."""
+    if "fast" in mode:
+        return f"pymupdf4llm-{pymupdf4llm.__version__}/pymupdf-{pymupdf.VersionBind}/v{PARSER_OUTPUT_VERSION}"
+    return f"docling-{importlib.metadata.version('docling')}/{docling_profile}/v{PARSER_OUTPUT_VERSION}"
+
+
+def get_docling_converter(
+    do_ocr=True,
+    do_table_structure=True,
+    table_mode="accurate",
+    num_threads=DOCLING_NUM_THREADS,
+    device=DOCLING_DEVICE,
+):
+    key = (do_ocr, do_table_structure, table_mode, num_threads, device)
+
+    with _docling_converters_lock:
+        if key in _docling_converters:
+            return _docling_converters[key]
+
+        from docling.document_converter import DocumentConverter, PdfFormatOption
+        from docling.datamodel.pipeline_options import (
+            PdfPipelineOptions,
+            AcceleratorOptions,
+            TableFormerMode,
+        )
+        from docling.datamodel.base_models import InputFormat
+        from docling.datamodel.settings import settings
+
+        settings.debug.profile_pipeline_timings = True
+
+        accelerator_options = AcceleratorOptions(num_threads=num_threads, device=device)
+        if device.startswith("cuda"):
+            accelerator_options.cuda_use_flash_attention2 = True
 
-    settings.debug.profile_pipeline_timings = True
+        pipeline_options = PdfPipelineOptions()
+        pipeline_options.accelerator_options = accelerator_options
 
-    accelerator_options = AcceleratorOptions()
+        pipeline_options.do_ocr = do_ocr
+        pipeline_options.do_table_structure = do_table_structure
+        pipeline_options.table_structure_options.do_cell_matching = True
+        pipeline_options.table_structure_options.mode = TableFormerMode(table_mode)
 
-    pipeline_options = PdfPipelineOptions()
-    pipeline_options.accelerator_options = accelerator_options
-    pipeline_options.accelerator_options.device = AcceleratorDevice.AUTO
-    pipeline_options.accelerator_options.cuda_use_flash_attention2 = True
+        converter = DocumentConverter(
+            allowed_formats=[InputFormat.PDF],
+            format_options={
+                InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
+            },
+        )
 
-    pipeline_options.do_ocr = True
-    pipeline_options.do_table_structure = True
-    pipeline_options.table_structure_options.do_cell_matching = True
-    pipeline_options.table_structure_options.mode = TableFormerMode.ACCURATE
+        init_start = time.time()
+        converter.initialize_pipeline(InputFormat.PDF)
+        logger.info(
+            f"Docling converter initialized in {time.time() - init_start:.2f} seconds "
+            f"(device={device}, num_threads={num_threads}, ocr={do_ocr}, "
+            f"tables={table_mode if do_table_structure else 'off'})."
+        )
 
-    converter = DocumentConverter(
-        allowed_formats=[InputFormat.PDF],
-        format_options={
-            InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
-        },
+        _docling_converters[key] = converter
+        return converter
+
+
+def _plan_docling_runs(pdf, profile):
+    """Group consecutive pages that need the same OCR and table settings.
+
+    Pages are only analyzed for what the profile leaves to them: a profile
+    that always runs OCR and the table model on every page needs no analysis.
+    """
+    settings = DOCLING_PROFILES[profile]
+    pages = analyze_pdf_pages(
+        pdf,
+        text_layer=settings["ocr"] == "auto",
+        tables=not settings["all_pages"],
     )
 
-    converter_result = converter.convert(source_location)
+    runs = []
+    for page in pages:
+        if settings["ocr"] == "always":
+            do_ocr = True
+        elif settings["ocr"] == "auto":
+            do_ocr = not page["has_text_layer"]
+        else:
+            do_ocr = False
+        do_table_structure = settings["all_pages"] or page["has_tables"]
+
+        if (
+            runs
+            and runs[-1]["do_ocr"] == do_ocr
+            and runs[-1]["do_table_structure"] == do_table_structure
+        ):
+            runs[-1]["end"] = page["page"]
+        else:
+            runs.append(
+                {
+                    "start": page["page"],
+                    "end": page["page"],
+                    "do_ocr": do_ocr,
+                    "do_table_structure": do_table_structure,
+                    "table_mode": settings["tables"],
+                }
+            )
+
+    return runs
+
+
+def _docling_source(pdf):
+    if pdf.path:
+        return pdf.path
+
+    from docling.datamodel.base_models import DocumentStream
+
+    return DocumentStream(name=os.path.basename(pdf.name), stream=BytesIO(pdf.data))
+
+
+def _split_docling_runs(runs, pages_to_convert):
+    """Cut runs down to consecutive pages that need converting, keeping their settings."""
+    split_runs = []
+    for run in runs:
+        start = None
+        for page in range(run["start"], run["end"] + 2):
+            if page <= run["end"] and page in pages_to_convert:
+                if start is None:
+                    start = page
+            elif start is not None:
+                split_runs.append({**run, "start": start, "end": page - 1})
+                start = None
+    return split_runs
+
+
+def _convert_docling_runs(pdf, runs):
+    """Convert runs of pages, returning ``{page: markdown}`` with 1-based pages."""
+    page_markdown = {}
+    for run in runs:
+        converter = get_docling_converter(
+            do_ocr=run["do_ocr"],
+            do_table_structure=run["do_table_structure"],
+            table_mode=run["table_mode"],
+        )
+        with _docling_convert_lock:
+            converter_result = converter.convert(
+                _docling_source(pdf), page_range=(run["start"], run["end"])
+            )
+
+        doc_conversion_secs = converter_result.timings["pipeline_total"].times
+        logger.info(
+            f"Converted pages {run['start']}-{run['end']} (ocr={run['do_ocr']}, "
+            f"tables={run['table_mode'] if run['do_table_structure'] else 'off'}) "
+            f"in {doc_conversion_secs} secs"
+        )
+        page_markdown.update(
+            _export_docling_pages(converter_result.document, run["start"], run["end"])
+        )
+
+    return page_markdown
 
-    doc_conversion_secs = converter_result.timings["pipeline_total"].times
-    logger.info(f"Conversion secs: {doc_conversion_secs}")
 
-    markdown_document = converter_result.document.export_to_markdown()
+def _export_docling_pages(document, start, end):
+    """Export a converted run once, returning ``{page: markdown}``.
 
-    toc = get_pdf_toc(source_location)
+    Docling puts the page break placeholder wherever the page changes in
+    reading order, so one pass over the items gives the page of every part.
+    Docling keeps the original page numbers when converting a range.
+    """
+    part_pages = []
+    for item, _ in document.iterate_items():
+        prov = getattr(item, "prov", None)
+        if prov and (not part_pages or prov[0].page_no != part_pages[-1]):
+            part_pages.append(prov[0].page_no)
+
+    parts = document.export_to_markdown(
+        page_break_placeholder=DOCLING_PAGE_BREAK
+    ).split(DOCLING_PAGE_BREAK)
+    if len(parts) != max(len(part_pages), 1):
+        logger.warning(
+            f"Found {len(parts)} markdown parts for {len(part_pages)} page runs "
+            f"in pages {start}-{end}, exporting them one by one"
+        )
+        return {
+            page: document.export_to_markdown(page_no=page)
+            for page in range(start, end + 1)
+        }
+
+    page_parts = {page: [] for page in range(start, end + 1)}
+    for page, part in zip(part_pages or [start], parts):
+        page_parts.setdefault(page, []).append(part.strip())
+    return {
+        page: "\n\n".join(part for part in texts if part)
+        for page, texts in page_parts.items()
+    }
+
+
+def convert_pdf_to_markdown_pages_docling(
+    source, profile=DOCLING_PROFILE, previous_pages=None
+):
+    """Return ``(page, fingerprint, markdown)`` for every page, in order.
+
+    A page's fingerprint covers its content and the OCR and table settings it
+    is converted with. Pages whose fingerprint is in ``previous_pages``
+    (fingerprint -> markdown) reuse that markdown instead of being converted.
+    """
+    previous_pages = previous_pages or {}
+
+    with open_prepared_pdf(source) as pdf:
+        runs = _plan_docling_runs(pdf, profile)
+        page_fingerprints = get_page_fingerprints(pdf)
+
+        fingerprints = {}
+        for run in runs:
+            settings = (
+                f"{run['do_ocr']}:{run['do_table_structure']}:{run['table_mode']}"
+            )
+            for page in range(run["start"], run["end"] + 1):
+                fingerprints[page] = hashlib.sha256(
+                    f"{page_fingerprints[page - 1]}:{settings}".encode()
+                ).hexdigest()
+
+        pages_to_convert = {
+            page
+            for page, fingerprint in fingerprints.items()
+            if fingerprint not in previous_pages
+        }
+        if previous_pages:
+            logger.info(
+                f"Converting {len(pages_to_convert)} changed pages, reusing {len(fingerprints) - len(pages_to_convert)}."
+            )
+        page_markdown = _convert_docling_runs(
+            pdf, _split_docling_runs(runs, pages_to_convert)
+        )
+
+    return [
+        (
+            page,
+            fingerprint,
+            page_markdown[page]
+            if page in page_markdown
+            else previous_pages[fingerprint],
+        )
+        for page, fingerprint in fingerprints.items()
+    ]
+
+
+def assemble_docling_markdown_document(pages, toc):
+    markdown_document = "\n\n".join(markdown for _, _, markdown in pages if markdown)
 
     markdown_document_with_fixed_headings = adjust_markdown_headings(
         markdown_document, toc
@@ -52,9 +296,116 @@ def convert_pdf_to_markdown_document_docling(source_location):
     return markdown_document_with_fixed_headings
 
 
-def convert_pdf_to_markdown_document_pymupdf4llm(source_location):
-    markdown_document = pymupdf4llm.to_markdown(
-        source_location, ignore_images=True, ignore_graphics=True, show_progress=True
+PYMUPDF4LLM_OPTIONS = {"ignore_images": True, "ignore_graphics": True}
+
+_worker_doc = None
+
+
+def _init_pymupdf4llm_worker(path_or_bytes):
+    global _worker_doc
+    if isinstance(path_or_bytes, str):
+        _worker_doc = pymupdf.open(path_or_bytes)
+    else:
+        _worker_doc = pymupdf.open(stream=path_or_bytes, filetype="pdf")
+
+
+def _to_markdown_pages(doc, pages, hdr_info):
+    # page_chunks returns one entry per page; their texts concatenate to the
+    # same markdown as a plain to_markdown call over the slice.
+    page_chunks = pymupdf4llm.to_markdown(
+        doc, pages=pages, hdr_info=hdr_info, page_chunks=True, **PYMUPDF4LLM_OPTIONS
     )
+    return [page_chunk["text"] for page_chunk in page_chunks]
+
+
+def _convert_pages_pymupdf4llm(pages, hdr_info):
+    return _to_markdown_pages(_worker_doc, pages, hdr_info)
+
+
+def _page_slices(page_numbers, pages_per_slice):
+    return [
+        page_numbers[start : start + pages_per_slice]
+        for start in range(0, len(page_numbers), pages_per_slice)
+    ]
+
+
+def _iter_converted_pages_pymupdf4llm(
+    pdf, page_numbers, hdr_info, pages_per_slice, workers
+):
+    slices = _page_slices(page_numbers, pages_per_slice)
+    last_page = pdf.page_numbers[-1] + 1 if pdf.page_numbers else 0
+
+    if workers <= 1 or len(page_numbers) < PARSER_PARALLEL_MIN_PAGES:
+        for pages in slices:
+            markdown_pages = _to_markdown_pages(pdf.doc, pages, hdr_info)
+            logger.info(f"Parsed pages {pages[0] + 1}-{pages[-1] + 1} of {last_page}")
+            yield from zip(pages, markdown_pages)
+        return
+
+    # Spawned workers are safe to start from the ingestion pipeline's threads.
+    # Each worker opens the PDF once, from its path or from a copy of the bytes.
+    executor = ProcessPoolExecutor(
+        max_workers=min(workers, len(slices)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_pymupdf4llm_worker,
+        initargs=(pdf.path or pdf.tobytes(),),
+    )
+    try:
+        markdown_slices = executor.map(
+            _convert_pages_pymupdf4llm, slices, [hdr_info] * len(slices)
+        )
+        for pages, markdown_pages in zip(slices, markdown_slices):
+            logger.info(f"Parsed pages {pages[0] + 1}-{pages[-1] + 1} of {last_page}")
+            yield from zip(pages, markdown_pages)
+    except BaseException:
+        # Closed early (GeneratorExit) or failed: drop the queued slices
+        # instead of waiting for every worker to finish them.
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+
+
+def iter_pdf_markdown_pages_pymupdf4llm(
+    source,
+    previous_pages=None,
+    pages_per_slice=PIPELINE_PAGES_PER_SECTION,
+    workers=PARSER_WORKERS,
+):
+    """Yield ``(page, fingerprint, markdown)`` for every page, in order.
+
+    Header levels are derived from font sizes across the whole document, so
+    every page is converted with one shared IdentifyHeaders instance, and a
+    page's fingerprint covers both its content and those header levels. Pages
+    whose fingerprint is in ``previous_pages`` (fingerprint -> markdown) reuse
+    that markdown instead of being converted.
+    """
+    previous_pages = previous_pages or {}
+
+    with open_prepared_pdf(source) as pdf:
+        hdr_info = pymupdf4llm.IdentifyHeaders(pdf.doc, pages=pdf.page_numbers)
+        headers_key = repr(sorted(hdr_info.header_id.items()))
+        fingerprints = {
+            page: hashlib.sha256(f"{fingerprint}:{headers_key}".encode()).hexdigest()
+            for page, fingerprint in get_page_fingerprints(pdf).items()
+        }
+
+        pages_to_convert = [
+            page
+            for page in pdf.page_numbers
+            if fingerprints[page] not in previous_pages
+        ]
+        if previous_pages:
+            logger.info(
+                f"Converting {len(pages_to_convert)} changed pages, reusing {pdf.page_count - len(pages_to_convert)}."
+            )
+        converted_pages = _iter_converted_pages_pymupdf4llm(
+            pdf, pages_to_convert, hdr_info, pages_per_slice, workers
+        )
 
-    return markdown_document
+        for page in pdf.page_numbers:
+            fingerprint = fingerprints[page]
+            if fingerprint in previous_pages:
+                yield page, fingerprint, previous_pages[fingerprint]
+            else:
+                _, markdown = next(converted_pages)
+                yield page, fingerprint, markdown
@@ -0,0 +1,164 @@
+import threading
+import time
+
+import grpc
+from botocore.config import Config
+from langchain_aws.utils import create_aws_client
+from loguru import logger
+from qdrant_client import QdrantClient
+from qdrant_client.http.exceptions import ResponseHandlingException
+
+from ..config import (
+    BEDROCK_MAX_POOL_CONNECTIONS,
+    QDRANT_GRPC_PORT,
+    QDRANT_HOST,
+    QDRANT_PATH,
+    QDRANT_PORT,
+    QDRANT_PREFER_GRPC,
+)
+
+GRPC_CONNECTION_ERROR_CODES = (
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+)
+
+_qdrant_client = None
+# Collections checked on the current connection, with their params.
+_ready_collections = {}
+_qdrant_client_lock = threading.Lock()
+_collections_lock = threading.Lock()
+
+_bedrock_runtime_client = None
+_bedrock_runtime_client_lock = threading.Lock()
+
+
+def get_qdrant_client() -> QdrantClient:
+    """Return the process-wide Qdrant client, connecting on first use."""
+    global _qdrant_client
+    with _qdrant_client_lock:
+        if _qdrant_client is None:
+            if QDRANT_PATH == ":memory:":
+                _qdrant_client = QdrantClient(location=QDRANT_PATH)
+            elif QDRANT_PATH:
+                _qdrant_client = QdrantClient(path=QDRANT_PATH)
+            else:
+                _qdrant_client = QdrantClient(
+                    host=QDRANT_HOST,
+                    port=QDRANT_PORT,
+                    grpc_port=QDRANT_GRPC_PORT,
+                    prefer_grpc=QDRANT_PREFER_GRPC,
+                )
+        return _qdrant_client
+
+
+def reset_qdrant_client():
+    """Drop the shared Qdrant client so the next call reconnects.
+
+    The old client is not closed, since other threads may still be using it.
+    """
+    global _qdrant_client
+    with _qdrant_client_lock:
+        _qdrant_client = None
+        _ready_collections.clear()
+
+
+def ensure_collection(collection_name, payload_indexes=None, **collection_config):
+    """Create the collection if it does not exist, checking once per connection.
+
+    ``collection_config`` is passed on to ``create_collection``.
+    ``payload_indexes`` maps payload keys to their index schema; missing
+    indexes are created on new and existing collections alike. Returns the
+    collection's params, as created or as found.
+    """
+    if collection_name in _ready_collections:
+        return _ready_collections[collection_name]
+
+    with _collections_lock:
+        if collection_name in _ready_collections:
+            return _ready_collections[collection_name]
+
+        client = get_qdrant_client()
+        if not client.collection_exists(collection_name=collection_name):
+            client.create_collection(
+                collection_name=collection_name, **collection_config
+            )
+        info = client.get_collection(collection_name)
+        if payload_indexes:
+            _ensure_payload_indexes(
+                client, collection_name, info.payload_schema, payload_indexes
+            )
+        _ready_collections[collection_name] = info.config.params
+        return info.config.params
+
+
+def _ensure_payload_indexes(client, collection_name, payload_schema, payload_indexes):
+    # Qdrant reports indexed keys without the JSON path quoting.
+    indexed_keys = {key.strip('"') for key in payload_schema}
+    for key, field_schema in payload_indexes.items():
+        if key.strip('"') in indexed_keys:
+            continue
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=key,
+            field_schema=field_schema,
+            wait=True,
+        )
+        logger.info(f"Created a payload index on {key} in {collection_name}.")
+
+
+def is_qdrant_connection_error(error):
+    if isinstance(error, ResponseHandlingException):
+        return True
+    return isinstance(error, grpc.RpcError) and (
+        error.code() in GRPC_CONNECTION_ERROR_CODES
+    )
+
+
+def call_qdrant(operation):
+    """Run ``operation()``, reconnecting and retrying once if Qdrant is unreachable.
+
+    ``operation`` must get its client from ``get_qdrant_client`` (directly or
+    through ``setup_qdrant_client``) so the retry uses the new connection.
+    """
+    try:
+        return operation()
+    except Exception as e:
+        if not is_qdrant_connection_error(e):
+            raise
+        logger.warning(f"Qdrant request failed ({e}), reconnecting")
+        reset_qdrant_client()
+        return operation()
+
+
+def check_qdrant_health() -> dict:
+    """Ping Qdrant, returning ``ok``, ``latency`` in seconds and ``error``.
+
+    A failed check drops the shared client, so the next call reconnects.
+    """
+    start_time = time.perf_counter()
+    try:
+        get_qdrant_client().get_collections()
+    except Exception as e:
+        reset_qdrant_client()
+        return {
+            "ok": False,
+            "latency": time.perf_counter() - start_time,
+            "error": str(e),
+        }
+    return {"ok": True, "latency": time.perf_counter() - start_time, "error": None}
+
+
+def get_bedrock_runtime_client():
+    """Return the process-wide Bedrock runtime client shared by chat and embedding models.
+
+    boto3 clients are thread-safe and keep their HTTPS connections pooled, so
+    one client serves every thread.
+    """
+    global _bedrock_runtime_client
+    with _bedrock_runtime_client_lock:
+        if _bedrock_runtime_client is None:
+            _bedrock_runtime_client = create_aws_client(
+                "bedrock-runtime",
+                config=Config(max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS),
+            )
+        return _bedrock_runtime_client
@@ -0,0 +1,341 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ..config import (
+    DOWNLOAD_CACHE_DIR,
+    DOWNLOAD_CACHE_MAX_MB,
+    DOWNLOAD_POOL_SIZE,
+    DOWNLOAD_TIMEOUT_SECONDS,
+)
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_ATTEMPTS = 3
+EVICTION_TARGET_RATIO = 0.9
+
+
+class DownloadError(Exception):
+    pass
+
+
+def is_url(source):
+    return urlparse(source).scheme in ("http", "https")
+
+
+def create_http_session(pool_size=DOWNLOAD_POOL_SIZE):
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as f:
+        json.dump(data, f)
+    os.replace(temporary_path, path)
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PdfDownloader:
+    """Downloads PDFs through a pooled HTTP session into a content-addressed cache.
+
+    Each URL remembers the ETag and Last-Modified of its last download, so
+    downloading it again is a conditional request that the server answers with
+    304 when the PDF has not changed. An interrupted transfer is kept as a
+    partial file and resumed with a Range request, guarded by If-Range so a
+    changed PDF is downloaded from the start. Cached PDFs are stored by SHA-256
+    and the least recently used ones are evicted past ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        cache_dir,
+        max_bytes,
+        session=None,
+        timeout=DOWNLOAD_TIMEOUT_SECONDS,
+        chunk_size=DOWNLOAD_CHUNK_SIZE,
+    ):
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.urls_dir = os.path.join(cache_dir, "urls")
+        self.partial_dir = os.path.join(cache_dir, "partial")
+        self.max_bytes = max_bytes
+        self.session = session or create_http_session()
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self._url_locks = {}
+        self._url_locks_lock = threading.Lock()
+
+        for directory in (self.objects_dir, self.urls_dir, self.partial_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def download(self, url):
+        """Return the cached PDF for ``url``, downloading it only if it changed.
+
+        The result has the local ``path``, ``sha256`` and ``size`` of the PDF,
+        ``not_modified`` (the server answered 304), ``unchanged`` (same content
+        as the previous download), ``resumed``, ``bytes_downloaded`` and
+        ``download_time`` covering the whole transfer.
+        """
+        with self._url_lock(url):
+            return self._download(url)
+
+    def get_ingested_document(self, url, sha256, ingest_key):
+        """Return the document recorded by ``mark_ingested`` for this content
+        and ``ingest_key``, or None if it was not ingested that way."""
+        meta = _read_json(self._url_meta_path(url)) or {}
+        marker = meta.get("ingested", {}).get(ingest_key)
+        if marker is None or marker["sha256"] != sha256:
+            return None
+        return marker.get("document")
+
+    def mark_ingested(self, url, sha256, ingest_key, document):
+        """Record that the content ``sha256`` of ``url`` was ingested as
+        ``document`` (its identifying metadata). ``ingest_key`` identifies the
+        collection, parser and chunker, so ingesting the URL in other ways is
+        tracked separately."""
+        with self._url_lock(url):
+            meta_path = self._url_meta_path(url)
+            meta = _read_json(meta_path) or {"url": url}
+            meta.setdefault("ingested", {})[ingest_key] = {
+                "sha256": sha256,
+                "document": document,
+            }
+            _write_json(meta_path, meta)
+
+    def _url_lock(self, url):
+        with self._url_locks_lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def _url_key(self, url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _url_meta_path(self, url):
+        return os.path.join(self.urls_dir, f"{self._url_key(url)}.json")
+
+    def _object_path(self, sha256):
+        return os.path.join(self.objects_dir, f"{sha256}.pdf")
+
+    def _download(self, url):
+        meta_path = self._url_meta_path(url)
+        meta = _read_json(meta_path) or {"url": url}
+
+        cached_path = None
+        if meta.get("sha256") and os.path.exists(self._object_path(meta["sha256"])):
+            cached_path = self._object_path(meta["sha256"])
+
+        conditional_headers = {}
+        if cached_path:
+            if meta.get("etag"):
+                conditional_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                conditional_headers["If-Modified-Since"] = meta["last_modified"]
+
+        part_path = self._partial_path(url)
+        initial_bytes = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        start_time = time.perf_counter()
+        resumed = False
+
+        for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+            try:
+                status_code, resumed_from = self._fetch(url, conditional_headers)
+                resumed = resumed or resumed_from > 0
+                break
+            except (
+                requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as e:
+                if attempt == DOWNLOAD_ATTEMPTS:
+                    raise
+                logger.warning(
+                    f"Download of {url} interrupted ({e}), resuming (attempt {attempt + 1}/{DOWNLOAD_ATTEMPTS})"
+                )
+
+        download_time = time.perf_counter() - start_time
+
+        if status_code == 304:
+            bytes_downloaded = 0
+            os.utime(cached_path)
+            sha256 = meta["sha256"]
+            path = cached_path
+            previous_sha256 = sha256
+        else:
+            bytes_downloaded = os.path.getsize(part_path) - (
+                initial_bytes if resumed else 0
+            )
+            path, sha256 = self._store_partial(url)
+            previous_sha256 = meta.get("sha256")
+            part_meta = _read_json(self._partial_meta_path(url)) or {}
+            meta.update(
+                etag=part_meta.get("etag"),
+                last_modified=part_meta.get("last_modified"),
+                sha256=sha256,
+            )
+            os.remove(self._partial_meta_path(url))
+            _write_json(meta_path, meta)
+            self._evict(keep=path)
+
+        return {
+            "url": url,
+            "path": path,
+            "sha256": sha256,
+            "size": os.path.getsize(path),
+            "not_modified": status_code == 304,
+            "unchanged": sha256 == previous_sha256,
+            "resumed": resumed,
+            "bytes_downloaded": bytes_downloaded,
+            "download_time": download_time,
+        }
+
+    def _partial_path(self, url):
+        return os.path.join(self.partial_dir, f"{self._url_key(url)}.part")
+
+    def _partial_meta_path(self, url):
+        return os.path.join(self.partial_dir, f"{self._url_key(url)}.json")
+
+    def _fetch(self, url, conditional_headers):
+        part_path = self._partial_path(url)
+        part_meta_path = self._partial_meta_path(url)
+        part_meta = _read_json(part_meta_path) or {}
+
+        headers = dict(conditional_headers)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = part_meta.get("etag") or part_meta.get("last_modified")
+        if offset and validator:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+        else:
+            offset = 0
+
+        with self.session.get(
+            url, headers=headers, stream=True, timeout=self.timeout
+        ) as response:
+            if response.status_code == 304:
+                return 304, 0
+
+            if response.status_code not in (200, 206):
+                raise DownloadError(
+                    f"Failed to download PDF. Status code: {response.status_code}"
+                )
+
+            content_type = response.headers.get("content-type", "").lower()
+            if "application/pdf" not in content_type:
+                raise DownloadError(
+                    f"URL does not point to a PDF file. Content type: {content_type}"
+                )
+
+            if response.status_code == 206:
+                content_range = response.headers.get("content-range", "")
+                if not content_range.startswith(f"bytes {offset}-"):
+                    os.remove(part_path)
+                    raise DownloadError(
+                        f"Unexpected Content-Range {content_range!r} when resuming at byte {offset}"
+                    )
+            else:
+                # A full response: the server ignored the range, or If-Range
+                # found that the PDF changed since the partial download.
+                offset = 0
+                _write_json(
+                    part_meta_path,
+                    {
+                        "etag": response.headers.get("etag"),
+                        "last_modified": response.headers.get("last-modified"),
+                    },
+                )
+
+            with open(part_path, "ab" if offset else "wb") as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    f.write(chunk)
+
+        return response.status_code, offset
+
+    def _store_partial(self, url):
+        part_path = self._partial_path(url)
+        sha256 = _hash_file(part_path)
+        path = self._object_path(sha256)
+
+        if os.path.exists(path):
+            os.remove(part_path)
+            os.utime(path)
+        else:
+            os.replace(part_path, path)
+
+        return path, sha256
+
+    def _evict(self, keep):
+        objects = []
+        for name in os.listdir(self.objects_dir):
+            path = os.path.join(self.objects_dir, name)
+            stat = os.stat(path)
+            objects.append((stat.st_mtime, stat.st_size, path))
+
+        size_bytes = sum(size for _, size, _ in objects)
+        if size_bytes <= self.max_bytes:
+            return
+
+        target_bytes = int(self.max_bytes * EVICTION_TARGET_RATIO)
+        for _, size, path in sorted(objects):
+            if size_bytes <= target_bytes:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            size_bytes -= size
+            logger.info(f"Evicted {os.path.basename(path)} from the download cache.")
+
+
+def format_download_message(download):
+    if download["not_modified"]:
+        return "✅ PDF not modified since the last download, using the cached copy."
+
+    megabytes = download["bytes_downloaded"] / (1024 * 1024)
+    rate = megabytes / max(download["download_time"], 1e-9)
+    resumed = ", resumed" if download["resumed"] else ""
+    return f"✅ PDF download completed in {download['download_time']:.2f} seconds ({megabytes:.1f} MB at {rate:.1f} MB/s{resumed})."
+
+
+_pdf_downloader = None
+_pdf_downloader_lock = threading.Lock()
+
+
+def get_pdf_downloader() -> PdfDownloader:
+    global _pdf_downloader
+    with _pdf_downloader_lock:
+        if _pdf_downloader is None:
+            _pdf_downloader = PdfDownloader(
+                DOWNLOAD_CACHE_DIR, DOWNLOAD_CACHE_MAX_MB * 1024 * 1024
+            )
+        return _pdf_downloader
@@ -1,25 +1,30 @@
 import re
 
+# A heading line whose text is on the same line as its "#" marks.
+_HEADING_LINE = re.compile(r"^#+[^\S\n]+(\S[^\n]*)$", re.MULTILINE)
 
-def adjust_markdown_headings(markdown_doc, toc):
-    current_markdown = markdown_doc
-    processed_headings = set()
+# A line of only "#" marks and whitespace. The original per-heading pattern
+# (r"^#+\s+<heading>$") can match across such a line into the next one.
+_BARE_HEADING_LINE = re.compile(r"^#+[^\S\n]*\n", re.MULTILINE)
 
-    for heading_info in toc:
-        level, heading_text, page_num = heading_info
 
+def _heading_levels(toc):
+    levels = {}
+    for level, heading_text, page_num in toc:
         if page_num < 1:
             continue
 
         heading_text = heading_text.strip()
-        if not heading_text:
-            continue
+        if heading_text and heading_text not in levels:
+            levels[heading_text] = level
 
-        if heading_text in processed_headings:
-            continue
+    return levels
 
-        processed_headings.add(heading_text)
 
+def _adjust_markdown_headings_sequential(markdown_doc, levels):
+    current_markdown = markdown_doc
+
+    for heading_text, level in levels.items():
         target_prefix = "#" * level + " "
 
         escaped_heading = re.escape(heading_text)
@@ -28,6 +33,34 @@ def adjust_markdown_headings(markdown_doc, toc):
 
         replacement = target_prefix + heading_text
 
-        current_markdown = pattern.sub(replacement, current_markdown)
+        # A callable keeps backslashes in the heading text literal.
+        current_markdown = pattern.sub(lambda _: replacement, current_markdown)
 
     return current_markdown
+
+
+def adjust_markdown_headings(markdown_doc, toc):
+    """Set every markdown heading that appears in the TOC to its TOC level.
+
+    The first TOC entry wins when a heading text repeats. Heading lines are
+    scanned once and looked up by their text.
+    """
+    levels = _heading_levels(toc)
+    if not levels:
+        return markdown_doc
+
+    if _BARE_HEADING_LINE.search(markdown_doc) or any(
+        "\n" in heading_text for heading_text in levels
+    ):
+        # Matches can span lines here, so keep the per-heading replacement
+        # order to produce the same result.
+        return _adjust_markdown_headings_sequential(markdown_doc, levels)
+
+    def replace(match):
+        heading_text = match.group(1)
+        level = levels.get(heading_text)
+        if level is None:
+            return match.group(0)
+        return "#" * level + " " + heading_text
+
+    return _HEADING_LINE.sub(replace, markdown_doc)
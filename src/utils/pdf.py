@@ -1,32 +1,140 @@
-import pymupdf
-
+import hashlib
+import mmap
+from contextlib import contextmanager
+from functools import cached_property
 
-def remove_toc_and_document_history_from_pdf(input_pdf_path, output_pdf_path):
-    doc = pymupdf.open(input_pdf_path)
+import pymupdf
 
-    toc = get_pdf_toc(input_pdf_path)
 
-    for i in toc:
-        _, heading, page_num = i
-        doc_page_num = len(doc)
+def find_content_page_range(toc, page_count):
+    """Return the 0-based ``[start, end)`` page range without the TOC and document history."""
+    start, end = 0, page_count
 
-        if "Document History".lower() in heading.lower():
-            doc.delete_pages(from_page=page_num - 1, to_page=doc_page_num - 1)
+    for _, heading, page_num in toc:
+        if "Document History".lower() in heading.lower() and page_num >= 1:
+            end = page_num - 1
             break
 
-    for i in range(len(toc)):
-        _, heading, page_num = toc[i]
+    for i in range(len(toc) - 1):
+        _, heading, _ = toc[i]
         _, _, next_page_num = toc[i + 1]
 
-        if "Table of Contents".lower() in heading.lower():
-            doc.delete_pages(from_page=0, to_page=next_page_num - 2)
+        if "Table of Contents".lower() in heading.lower() and next_page_num >= 1:
+            start = next_page_num - 1
             break
 
-    doc.save(output_pdf_path)
-    doc.close()
+    if start >= end:
+        return 0, page_count
+    return start, end
+
+
+class PreparedPdf:
+    """A PDF opened once, with its title, TOC and content page range computed together.
+
+    Trimming the table of contents and document history is a page-range view
+    (``page_numbers``) over the original document instead of a re-saved copy.
+    ``toc`` is renumbered relative to that range, with ``-1`` for entries that
+    point outside it, like the TOC of a trimmed copy would be.
+    """
+
+    def __init__(self, data, name="document.pdf", path=None, trim=True):
+        self.data = data
+        self.name = name
+        self.path = path
+        self._mapped = None
+        self.doc = pymupdf.open(stream=data, filetype="pdf")
+        self.title = (self.doc.metadata or {}).get("title", "Untitled")
+        self.full_toc = self.doc.get_toc(simple=True)
+
+        if trim:
+            self.start_page, self.end_page = find_content_page_range(
+                self.full_toc, self.doc.page_count
+            )
+        else:
+            self.start_page, self.end_page = 0, self.doc.page_count
+
+        self.toc = [
+            [
+                level,
+                heading,
+                page_num - self.start_page
+                if self.start_page < page_num <= self.end_page
+                else -1,
+            ]
+            for level, heading, page_num in self.full_toc
+        ]
+
+    @classmethod
+    def from_path(cls, path, trim=True, name=None):
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(mapped)
+        try:
+            pdf = cls(data, name=name or path, path=path, trim=trim)
+        except BaseException:
+            data.release()
+            mapped.close()
+            raise
+        pdf._mapped = mapped
+        return pdf
+
+    @property
+    def page_numbers(self):
+        return list(range(self.start_page, self.end_page))
+
+    @property
+    def page_count(self):
+        return self.end_page - self.start_page
+
+    @cached_property
+    def content_hash(self):
+        """SHA-256 of the PDF bytes and the page range that is parsed."""
+        digest = hashlib.sha256(self.data)
+        digest.update(f":{self.start_page}-{self.end_page}".encode())
+        return digest.hexdigest()
+
+    def tobytes(self):
+        return bytes(self.data)
+
+    def save_trimmed(self, output_pdf_path):
+        doc = pymupdf.open(stream=self.data, filetype="pdf")
+        doc.select(self.page_numbers)
+        doc.save(output_pdf_path)
+        doc.close()
 
-    toc_after_cleanup = get_pdf_toc(output_pdf_path)
-    return toc_after_cleanup
+    def close(self):
+        self.doc.close()
+        if self._mapped is not None:
+            # The mapping can only be closed once no view of it is left.
+            self.data.release()
+            self._mapped.close()
+            self._mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+@contextmanager
+def open_prepared_pdf(source):
+    """Yield ``source`` if it is already a PreparedPdf, otherwise open the path untrimmed."""
+    if isinstance(source, PreparedPdf):
+        yield source
+        return
+
+    pdf = PreparedPdf.from_path(source, trim=False)
+    try:
+        yield pdf
+    finally:
+        pdf.close()
+
+
+def remove_toc_and_document_history_from_pdf(input_pdf_path, output_pdf_path):
+    with PreparedPdf.from_path(input_pdf_path) as pdf:
+        pdf.save_trimmed(output_pdf_path)
+        return pdf.toc
 
 
 def get_pdf_toc(input_pdf_path):
@@ -41,3 +149,63 @@ def get_pdf_title(input_pdf_path):
     title = doc.metadata.get("title", "Untitled")
     doc.close()
     return title
+
+
+MIN_TEXT_LAYER_CHARS = 20
+MIN_TABLE_DRAWING_ITEMS = 4
+
+
+def _page_may_have_tables(page):
+    # find_tables is slow, so only run it on pages that draw enough lines or
+    # rectangles to form a ruled table.
+    drawing_items = sum(
+        1
+        for drawing in page.get_drawings()
+        for item in drawing["items"]
+        if item[0] in ("l", "re")
+    )
+    if drawing_items < MIN_TABLE_DRAWING_ITEMS:
+        return False
+    return len(page.find_tables().tables) > 0
+
+
+def analyze_pdf_pages(pdf, text_layer=True, tables=True):
+    """Check each page for a text layer and for tables; skipped checks are None."""
+    pages = []
+    for page_number in pdf.page_numbers:
+        page = pdf.doc[page_number]
+        has_text_layer = None
+        if text_layer:
+            has_text_layer = len(page.get_text("text").strip()) >= MIN_TEXT_LAYER_CHARS
+        pages.append(
+            {
+                "page": page_number + 1,
+                "has_text_layer": has_text_layer,
+                "has_tables": _page_may_have_tables(page) if tables else None,
+            }
+        )
+    return pages
+
+
+def get_page_fingerprint(page):
+    """Hash what a page draws: its content streams, fonts, geometry and links."""
+    digest = hashlib.sha256(page.read_contents())
+    digest.update(
+        repr(
+            (
+                tuple(page.rect),
+                page.rotation,
+                sorted((font[3], font[4]) for font in page.get_fonts()),
+                [link.get("uri") for link in page.get_links()],
+            )
+        ).encode()
+    )
+    return digest.hexdigest()
+
+
+def get_page_fingerprints(pdf):
+    """Return ``{page_number: fingerprint}`` for the pages of a PreparedPdf."""
+    return {
+        page_number: get_page_fingerprint(pdf.doc[page_number])
+        for page_number in pdf.page_numbers
+    }
@@ -1,13 +1,20 @@
-from ..vector_store.qdrant_manager import setup_qdrant_client
+from ..vector_store.qdrant_manager import list_document_titles, setup_qdrant_client
+from .clients import call_qdrant
 
 
 def get_collection_metadata():
-    qdrant_client, collection_name = setup_qdrant_client()
+    def get_collection():
+        qdrant_client, collection_name = setup_qdrant_client()
+        return qdrant_client.get_collection(collection_name)
 
-    collection_metadata = qdrant_client.get_collection(collection_name)
+    collection_metadata = call_qdrant(get_collection)
 
     vector_count = collection_metadata.points_count
     collection_status = collection_metadata.status
     optimizer_status = collection_metadata.optimizer_status
 
     return vector_count, collection_status, optimizer_status
+
+
+def get_document_titles():
+    return call_qdrant(lambda: list_document_titles(*setup_qdrant_client()))
@@ -1,42 +1,211 @@
+import hashlib
+import json
+import re
+
+from langchain_core.documents import Document
 from langchain_text_splitters import (
     MarkdownHeaderTextSplitter,
     RecursiveCharacterTextSplitter,
 )
-from src.utils.pdf import get_pdf_title
 
+HEADERS_TO_SPLIT_ON = [
+    ("#", "Header 1"),
+    ("##", "Header 2"),
+    ("###", "Header 3"),
+    ("####", "Header 4"),
+]
+PARENT_CHUNK_TOKENS = 1024
+CHILD_CHUNK_TOKENS = 256
+CHILD_CHUNK_OVERLAP_TOKENS = 32
+MIN_CHUNK_LENGTH = 20
+
+PARENT_ID_KEY = "Parent id"
+PARENT_CONTENT_KEY = "parent_content"
+# Part of the ingest key of URLs; bump it when chunks or their payloads change.
+CHUNKER_VERSION = 4
+
+# Words are cut into pieces of up to six characters and every punctuation
+# mark counts on its own, which tracks subword tokenizers like Titan's closely
+# enough for sizing chunks without a tokenizer round trip.
+_TOKEN_PATTERN = re.compile(r"\w{1,6}|[^\w\s]")
+
+
+def estimate_tokens(text):
+    """Estimate the number of embedding-model tokens in ``text``."""
+    return len(_TOKEN_PATTERN.findall(text))
 
-def chunk_markdown(markdown_document, pdf_path):
-    headers_to_split_on = [
-        ("#", "Header 1"),
-        ("##", "Header 2"),
-        ("###", "Header 3"),
-        ("####", "Header 4"),
-    ]
 
+def get_parent_id(title, text, metadata):
+    headers = sorted((k, v) for k, v in metadata.items() if k.startswith("Header "))
+    return hashlib.sha256(
+        json.dumps([title, headers, text], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+def _split_headers(markdown_document):
+    """Split markdown into header sections; consecutive sections with the same
+    headers are merged into one."""
     markdown_splitter = MarkdownHeaderTextSplitter(
-        headers_to_split_on=headers_to_split_on
+        headers_to_split_on=HEADERS_TO_SPLIT_ON
     )
+    return markdown_splitter.split_text(markdown_document)
 
-    md_header_splits = markdown_splitter.split_text(markdown_document)
 
-    chunk_size = 10000
-    chunk_overlap = 500
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+def _merge_header_sections(previous, section):
+    # Joined like MarkdownHeaderTextSplitter joins the lines of a section.
+    return Document(
+        page_content=previous.page_content + "  \n" + section.page_content,
+        metadata=section.metadata,
     )
 
-    splits = text_splitter.split_documents(md_header_splits)
 
-    min_chunk_length = 20
-    filtered_splits = [
-        doc for doc in splits if len(doc.page_content.strip()) >= min_chunk_length
-    ]
+def _split_sections(md_header_splits, title):
+    """Split header sections into small child chunks that link to their parent.
 
-    text_chunks = [doc.page_content for doc in filtered_splits]
-    metadatas = [doc.metadata for doc in filtered_splits]
+    Header sections longer than ``PARENT_CHUNK_TOKENS`` are split into several
+    parents. Every parent is split into children of ``CHILD_CHUNK_TOKENS``,
+    which are the chunks that get embedded. A child's metadata carries its
+    headers, the document title, the parent id and the parent's text; the
+    text is stored once per parent, so a search hit can be widened to the
+    whole parent.
+    """
+    parent_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=PARENT_CHUNK_TOKENS,
+        chunk_overlap=0,
+        length_function=estimate_tokens,
+    )
+    child_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHILD_CHUNK_TOKENS,
+        chunk_overlap=CHILD_CHUNK_OVERLAP_TOKENS,
+        length_function=estimate_tokens,
+    )
 
-    title = get_pdf_title(pdf_path)
-    for metadata in metadatas:
-        metadata["Document title"] = title
+    text_chunks = []
+    metadatas = []
+
+    for parent in parent_splitter.split_documents(md_header_splits):
+        if len(parent.page_content.strip()) < MIN_CHUNK_LENGTH:
+            continue
+
+        parent_id = get_parent_id(title, parent.page_content, parent.metadata)
+
+        for child_text in child_splitter.split_text(parent.page_content):
+            if len(child_text.strip()) < MIN_CHUNK_LENGTH:
+                continue
+
+            text_chunks.append(child_text)
+            metadatas.append(
+                {
+                    **parent.metadata,
+                    "Document title": title,
+                    PARENT_ID_KEY: parent_id,
+                    PARENT_CONTENT_KEY: parent.page_content,
+                }
+            )
 
     return text_chunks, metadatas
+
+
+def _split_markdown(markdown_document, title):
+    """Split a whole markdown document into child chunks, see ``_split_sections``."""
+    return _split_sections(_split_headers(markdown_document), title)
+
+
+def _find_header_lines(markdown_text):
+    # Mirrors how MarkdownHeaderTextSplitter recognizes headers, including
+    # skipping fenced code blocks, so split points match a whole-document split.
+    headers = []
+    in_code_block = False
+    opening_fence = ""
+    offset = 0
+
+    for line in markdown_text.split("\n"):
+        stripped_line = "".join(filter(str.isprintable, line.strip()))
+
+        if not in_code_block:
+            if stripped_line.startswith("```") and stripped_line.count("```") == 1:
+                in_code_block = True
+                opening_fence = "```"
+            elif stripped_line.startswith("~~~"):
+                in_code_block = True
+                opening_fence = "~~~"
+        elif stripped_line.startswith(opening_fence):
+            in_code_block = False
+            opening_fence = ""
+
+        if not in_code_block:
+            for sep, _ in reversed(HEADERS_TO_SPLIT_ON):
+                if stripped_line.startswith(sep) and (
+                    len(stripped_line) == len(sep) or stripped_line[len(sep)] == " "
+                ):
+                    headers.append(
+                        (offset, len(sep), stripped_line[len(sep) :].strip())
+                    )
+                    break
+
+        offset += len(line) + 1
+
+    return headers
+
+
+def _update_header_stack(header_stack, headers):
+    header_stack = list(header_stack)
+    for _, level, text in headers:
+        while header_stack and header_stack[-1][0] >= level:
+            header_stack.pop()
+        header_stack.append((level, text))
+    return header_stack
+
+
+def chunk_markdown_stream(markdown_sections, title):
+    """Chunk markdown that arrives in pieces, e.g. one slice of pages at a time.
+
+    Text is buffered until a header starts a new section, then every complete
+    section is split by headers with the enclosing headers re-applied. The
+    last header section is held back, and merged with the first one of the
+    next piece if their headers are the same, as a whole-document split does.
+    So the result matches chunking the whole document at once, however the
+    markdown is cut into pieces. Yields ``(text_chunks, metadatas)`` tuples.
+    """
+    buffer = ""
+    header_stack = []
+    held_section = None
+
+    def split_piece(markdown):
+        nonlocal held_section
+        header_prefix = "".join(
+            f"{'#' * level} {text}\n" for level, text in header_stack
+        )
+        sections = _split_headers(header_prefix + markdown)
+        if not sections:
+            return None
+
+        if held_section is not None:
+            if sections[0].metadata == held_section.metadata:
+                sections[0] = _merge_header_sections(held_section, sections[0])
+            else:
+                sections.insert(0, held_section)
+        held_section = sections.pop()
+        return _split_sections(sections, title)
+
+    for section in markdown_sections:
+        buffer += section
+        headers = _find_header_lines(buffer)
+        if not headers or headers[-1][0] == 0:
+            continue
+
+        split_at = headers[-1][0]
+        complete, buffer = buffer[:split_at], buffer[split_at:]
+
+        chunks = split_piece(complete)
+        if chunks is not None:
+            yield chunks
+        header_stack = _update_header_stack(header_stack, headers[:-1])
+
+    if buffer:
+        chunks = split_piece(buffer)
+        if chunks is not None:
+            yield chunks
+
+    if held_section is not None:
+        yield _split_sections([held_section], title)
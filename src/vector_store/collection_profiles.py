@@ -0,0 +1,144 @@
+import time
+
+from loguru import logger
+from qdrant_client import models
+
+from ..config import COLLECTION_PROFILE, SEARCH_HNSW_EF
+from .embeddings import EMBEDDING_TYPE_BINARY
+
+# How a collection stores its vectors and payload. Quantized vectors are kept
+# in RAM for the HNSW search, and the top ``oversampling * limit`` candidates
+# are rescored with the original vectors, which can then live on disk.
+COLLECTION_PROFILES = {
+    "memory": {
+        "quantization": None,
+        "on_disk": False,
+        "on_disk_payload": False,
+        "oversampling": None,
+    },
+    "scalar": {
+        "quantization": "scalar",
+        "on_disk": True,
+        "on_disk_payload": True,
+        "oversampling": 2.0,
+    },
+    "binary": {
+        "quantization": "binary",
+        "on_disk": True,
+        "on_disk_payload": True,
+        "oversampling": 3.0,
+    },
+    "disk": {
+        "quantization": None,
+        "on_disk": True,
+        "on_disk_payload": True,
+        "oversampling": None,
+    },
+}
+
+SCALAR_QUANTIZATION_QUANTILE = 0.99
+COLLECTION_READY_POLL_SECONDS = 1
+
+
+def get_collection_profile(profile=COLLECTION_PROFILE):
+    if profile not in COLLECTION_PROFILES:
+        raise ValueError(
+            f"Unknown collection profile {profile!r}, expected one of {tuple(COLLECTION_PROFILES)}."
+        )
+    return COLLECTION_PROFILES[profile]
+
+
+def get_quantization_config(profile=COLLECTION_PROFILE):
+    return create_quantization_config(get_collection_profile(profile)["quantization"])
+
+
+def create_quantization_config(quantization):
+    if quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=SCALAR_QUANTIZATION_QUANTILE,
+                always_ram=True,
+            )
+        )
+    if quantization == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True)
+        )
+    return None
+
+
+def get_search_params(profile=COLLECTION_PROFILE, hnsw_ef=SEARCH_HNSW_EF):
+    """Return the search params for the profile, or None for Qdrant's defaults.
+
+    ``hnsw_ef`` sets the size of the HNSW candidate list: larger values raise
+    recall at the cost of latency. None uses the collection's ``ef_construct``.
+    """
+    settings = get_collection_profile(profile)
+    if settings["quantization"] is None and hnsw_ef is None:
+        return None
+
+    quantization = None
+    if settings["quantization"] is not None:
+        quantization = models.QuantizationSearchParams(
+            ignore=False,
+            rescore=True,
+            oversampling=settings["oversampling"],
+        )
+
+    return models.SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
+
+
+def migrate_collection(client, collection_name, profile, wait=True):
+    """Move an existing collection to ``profile`` in place.
+
+    Qdrant rebuilds the affected segments in the background: vectors and
+    payload are moved to or from disk and quantized vectors are built or
+    dropped. Searches keep working meanwhile. With ``wait``, this returns once
+    the collection is green again.
+    """
+    settings = get_collection_profile(profile)
+
+    client.update_collection(
+        collection_name=collection_name,
+        vectors_config={"": models.VectorParamsDiff(on_disk=settings["on_disk"])},
+        collection_params=models.CollectionParamsDiff(
+            on_disk_payload=settings["on_disk_payload"]
+        ),
+        quantization_config=get_quantization_config(profile)
+        or models.Disabled.DISABLED,
+    )
+    logger.info(f"Updated {collection_name} to the {profile!r} collection profile.")
+
+    if wait:
+        wait_for_collection(client, collection_name)
+
+
+def wait_for_collection(client, collection_name):
+    start_time = time.perf_counter()
+    while True:
+        info = client.get_collection(collection_name)
+        if info.status == models.CollectionStatus.GREEN:
+            break
+        time.sleep(COLLECTION_READY_POLL_SECONDS)
+
+    logger.info(
+        f"{collection_name} is ready after {time.perf_counter() - start_time:.1f} seconds."
+    )
+
+
+def estimate_vector_memory_bytes(points, dimensions, embedding_type, profile):
+    """Estimate the RAM taken by a collection's vectors, excluding HNSW links."""
+    settings = get_collection_profile(profile)
+
+    bytes_per_dimension = 1 if embedding_type == EMBEDDING_TYPE_BINARY else 4
+    memory_bytes = 0
+    if not settings["on_disk"]:
+        memory_bytes += points * dimensions * bytes_per_dimension
+
+    if settings["quantization"] == "scalar":
+        memory_bytes += points * dimensions
+    elif settings["quantization"] == "binary":
+        memory_bytes += points * -(-dimensions // 8)
+
+    return memory_bytes
@@ -0,0 +1,198 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import List, Optional
+
+from loguru import logger
+
+from ..config import EMBEDDING_CACHE_MAX_MB, EMBEDDING_CACHE_PATH
+
+# Rough per-row overhead of the key columns and SQLite bookkeeping.
+ROW_OVERHEAD_BYTES = 96
+EVICTION_TARGET_RATIO = 0.9
+SQLITE_MAX_VARIABLES = 900
+# Bulk ingestion shares the cache between worker processes.
+SQLITE_BUSY_TIMEOUT_SECONDS = 30
+
+
+class EmbeddingCache:
+    """SQLite-backed cache of embeddings keyed by (model id, dimensions, text hash).
+
+    Vectors are stored as packed float32 blobs. When the cache grows past
+    ``max_bytes`` the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(
+            path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_id TEXT NOT NULL,
+                dimensions INTEGER NOT NULL,
+                text_hash BLOB NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model_id, dimensions, text_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._connection.commit()
+
+        entries, vector_bytes = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+        self._entries = entries
+        self._size_bytes = vector_bytes + entries * ROW_OVERHEAD_BYTES
+
+    @staticmethod
+    def _hash_text(text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def get_many(
+        self, model_id: str, dimensions: int, texts: List[str]
+    ) -> List[Optional[List[float]]]:
+        hashes = [self._hash_text(text) for text in texts]
+        found = {}
+
+        with self._lock:
+            unique_hashes = list(dict.fromkeys(hashes))
+            for i in range(0, len(unique_hashes), SQLITE_MAX_VARIABLES):
+                batch = unique_hashes[i : i + SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"""
+                    SELECT text_hash, vector FROM embeddings
+                    WHERE model_id = ? AND dimensions = ?
+                    AND text_hash IN ({placeholders})
+                    """,
+                    (model_id, dimensions, *batch),
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._connection.executemany(
+                    """
+                    UPDATE embeddings SET last_used = ?
+                    WHERE model_id = ? AND dimensions = ? AND text_hash = ?
+                    """,
+                    [(now, model_id, dimensions, text_hash) for text_hash in found],
+                )
+                self._connection.commit()
+
+            results = []
+            for text_hash in hashes:
+                blob = found.get(text_hash)
+                if blob is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    results.append(array("f", blob).tolist())
+
+        return results
+
+    def put_many(
+        self,
+        model_id: str,
+        dimensions: int,
+        texts: List[str],
+        vectors: List[List[float]],
+    ):
+        now = time.time()
+        rows = {}
+        for text, vector in zip(texts, vectors):
+            rows[self._hash_text(text)] = array("f", vector).tobytes()
+
+        with self._lock:
+            for text_hash, blob in rows.items():
+                cursor = self._connection.execute(
+                    """
+                    INSERT OR IGNORE INTO embeddings
+                    (model_id, dimensions, text_hash, vector, last_used)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (model_id, dimensions, text_hash, blob, now),
+                )
+                if cursor.rowcount:
+                    self._entries += 1
+                    self._size_bytes += len(blob) + ROW_OVERHEAD_BYTES
+            self._connection.commit()
+
+            if self._size_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        target_bytes = int(self.max_bytes * EVICTION_TARGET_RATIO)
+        average_entry_bytes = self._size_bytes / max(self._entries, 1)
+        excess_entries = (
+            int((self._size_bytes - target_bytes) / average_entry_bytes) + 1
+        )
+
+        evicted_entries, evicted_bytes = self._connection.execute(
+            """
+            SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM (
+                SELECT vector FROM embeddings ORDER BY last_used LIMIT ?
+            )
+            """,
+            (excess_entries,),
+        ).fetchone()
+        self._connection.execute(
+            """
+            DELETE FROM embeddings WHERE (model_id, dimensions, text_hash) IN (
+                SELECT model_id, dimensions, text_hash FROM embeddings
+                ORDER BY last_used LIMIT ?
+            )
+            """,
+            (excess_entries,),
+        )
+        self._connection.commit()
+
+        self._entries -= evicted_entries
+        self._size_bytes -= evicted_bytes + evicted_entries * ROW_OVERHEAD_BYTES
+        logger.info(f"Evicted {evicted_entries} entries from the embedding cache.")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": self._entries,
+            "size_bytes": self._size_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _embedding_cache
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(
+                EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_MB * 1024 * 1024
+            )
+        return _embedding_cache
@@ -0,0 +1,194 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List
+
+from loguru import logger
+
+from ..config import (
+    EMBEDDING_DIMENSIONS,
+    EMBEDDING_MAX_CONCURRENCY,
+    EMBEDDING_MAX_RETRIES,
+    EMBEDDING_TYPE,
+)
+from .embeddings import get_embeddings
+
+THROTTLING_MARKERS = (
+    "throttl",
+    "too many requests",
+    "rate exceeded",
+    "serviceunavailable",
+    "service unavailable",
+)
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        code = response.get("Error", {}).get("Code", "")
+        if code in ("ThrottlingException", "TooManyRequestsException"):
+            return True
+
+    message = str(error).lower()
+    return any(marker in message for marker in THROTTLING_MARKERS)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Concurrency limit adjusted with additive increase / multiplicative decrease.
+
+    Every successful request grows the limit by roughly one slot per window of
+    requests; every throttled request shrinks it by ``decrease_factor``.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float,
+        max_limit: float,
+        min_limit: float = 1,
+        decrease_factor: float = 0.5,
+    ):
+        self.limit = float(initial_limit)
+        self.max_limit = float(max_limit)
+        self.min_limit = float(min_limit)
+        self.decrease_factor = decrease_factor
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self._in_flight < max(int(self.limit), 1)
+            )
+            self._in_flight += 1
+
+    async def release(self, throttled: bool = False):
+        async with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class EmbeddingError(Exception):
+    pass
+
+
+class EmbeddingScheduler:
+    """Embeds texts one request per text under an adaptive concurrency limit.
+
+    ``embed_query`` embeds a single text with one blocking request, and every
+    slot of the limit is one such request. The scheduler runs its own event
+    loop on a background thread and keeps the limit across calls, so a
+    throttle slows down every later request and the limit can grow towards
+    ``max_concurrency`` over a whole ingestion. Failed requests are retried on
+    their own with exponential backoff, so one throttled request does not
+    fail the whole run.
+    """
+
+    def __init__(
+        self,
+        embed_query: Callable[[str], List[float]],
+        max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+        max_retries: int = EMBEDDING_MAX_RETRIES,
+        base_backoff: float = 0.5,
+        max_backoff: float = 20.0,
+    ):
+        self.embed_query = embed_query
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=max(1, max_concurrency // 2),
+            max_limit=max_concurrency,
+        )
+        self.stats = {"texts": 0, "retries": 0, "throttled": 0}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="embedding"
+        )
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self._loop.run_forever, name="embedding-scheduler", daemon=True
+        ).start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """Start embedding ``texts``, returning a future of their vectors.
+
+        Cancelling the future stops the requests that have not started yet.
+        """
+        return asyncio.run_coroutine_threadsafe(self._embed(texts), self._loop)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.submit(texts).result()
+
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        start_time = time.perf_counter()
+        tasks = [asyncio.create_task(self._embed_text(text)) for text in texts]
+        try:
+            vectors = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        elapsed = time.perf_counter() - start_time
+        logger.info(
+            f"Embedded {len(texts)} chunks in {elapsed:.2f}s "
+            f"({len(texts) / max(elapsed, 1e-9):.1f} chunks/s, "
+            f"concurrency limit {self.limiter.limit:.1f})"
+        )
+        return vectors
+
+    async def _embed_text(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            await self.limiter.acquire()
+            throttled = False
+            try:
+                vector = await loop.run_in_executor(
+                    self._executor, self.embed_query, text
+                )
+            except Exception as e:
+                throttled = is_throttling_error(e)
+                if throttled:
+                    self.stats["throttled"] += 1
+                if attempt >= self.max_retries:
+                    raise EmbeddingError(
+                        f"Embedding a chunk failed after {attempt + 1} attempts: {e}"
+                    ) from e
+                error = e
+            else:
+                self.stats["texts"] += 1
+                return vector
+            finally:
+                await self.limiter.release(throttled=throttled)
+
+            attempt += 1
+            self.stats["retries"] += 1
+            backoff = min(self.max_backoff, self.base_backoff * 2**attempt)
+            backoff *= random.uniform(0.5, 1.0)
+            logger.warning(
+                f"Embedding a chunk failed (attempt {attempt}), retrying in {backoff:.2f}s: {error}"
+            )
+            await asyncio.sleep(backoff)
+
+
+_embedding_schedulers = {}
+_embedding_schedulers_lock = threading.Lock()
+
+
+def get_embedding_scheduler(
+    dimensions=EMBEDDING_DIMENSIONS, embedding_type=EMBEDDING_TYPE
+) -> EmbeddingScheduler:
+    """Return the process-wide scheduler for the embeddings model of the given settings."""
+    with _embedding_schedulers_lock:
+        key = (dimensions, embedding_type)
+        if key not in _embedding_schedulers:
+            _embedding_schedulers[key] = EmbeddingScheduler(
+                get_embeddings(dimensions, embedding_type).embed_query
+            )
+        return _embedding_schedulers[key]
@@ -0,0 +1,116 @@
+import os
+import threading
+from typing import List
+
+from langchain_aws import BedrockEmbeddings
+from langchain_core.embeddings import Embeddings
+
+from ..config import (
+    EMBEDDING_DIMENSIONS,
+    EMBEDDING_MODEL_ID,
+    EMBEDDING_PROVIDER,
+    EMBEDDING_TYPE,
+    OFFLINE_EMBEDDING_LATENCY_SECONDS,
+    OFFLINE_ERROR_RATE,
+    OFFLINE_SEED,
+)
+from ..utils.clients import get_bedrock_runtime_client
+from .local_embeddings import LOCAL_EMBEDDING_MODEL_ID, LocalEmbeddings
+
+EMBEDDING_TYPE_FLOAT = "float"
+EMBEDDING_TYPE_BINARY = "binary"
+EMBEDDING_TYPES = (EMBEDDING_TYPE_FLOAT, EMBEDDING_TYPE_BINARY)
+TITAN_V2_DIMENSIONS = (256, 512, 1024)
+
+EMBEDDING_PROVIDER_BEDROCK = "bedrock"
+EMBEDDING_PROVIDER_LOCAL = "local"
+EMBEDDING_PROVIDERS = (EMBEDDING_PROVIDER_BEDROCK, EMBEDDING_PROVIDER_LOCAL)
+
+
+class TitanEmbeddings(BedrockEmbeddings):
+    """``BedrockEmbeddings`` for Titan Text Embeddings V2 that can return binary vectors.
+
+    Binary embeddings come back as one 0/1 value per dimension under
+    ``embeddingsByType``, which ``BedrockEmbeddings`` does not read.
+    """
+
+    embedding_type: str = EMBEDDING_TYPE_FLOAT
+
+    def _embedding_func(
+        self, text: str, input_type: str = "search_document"
+    ) -> List[float]:
+        if self.embedding_type == EMBEDDING_TYPE_FLOAT:
+            return super()._embedding_func(text, input_type)
+
+        text = text.replace(os.linesep, " ")
+        response_body = self._invoke_model(input_body={"inputText": text})
+        return response_body["embeddingsByType"][self.embedding_type]
+
+
+def validate_embedding_settings(dimensions, embedding_type):
+    if EMBEDDING_PROVIDER not in EMBEDDING_PROVIDERS:
+        raise ValueError(
+            f"Unsupported embedding provider {EMBEDDING_PROVIDER!r}, expected one of {EMBEDDING_PROVIDERS}."
+        )
+    if dimensions not in TITAN_V2_DIMENSIONS:
+        raise ValueError(
+            f"Unsupported embedding dimensions {dimensions}, expected one of {TITAN_V2_DIMENSIONS}."
+        )
+    if embedding_type not in EMBEDDING_TYPES:
+        raise ValueError(
+            f"Unsupported embedding type {embedding_type!r}, expected one of {EMBEDDING_TYPES}."
+        )
+
+
+def create_embeddings(
+    dimensions=EMBEDDING_DIMENSIONS, embedding_type=EMBEDDING_TYPE
+) -> Embeddings:
+    validate_embedding_settings(dimensions, embedding_type)
+
+    if EMBEDDING_PROVIDER == EMBEDDING_PROVIDER_LOCAL:
+        return LocalEmbeddings(
+            dimensions=dimensions,
+            embedding_type=embedding_type,
+            latency=OFFLINE_EMBEDDING_LATENCY_SECONDS,
+            error_rate=OFFLINE_ERROR_RATE,
+            seed=OFFLINE_SEED,
+        )
+
+    model_kwargs = {"dimensions": dimensions, "normalize": True}
+    if embedding_type != EMBEDDING_TYPE_FLOAT:
+        model_kwargs["embeddingTypes"] = [embedding_type]
+
+    return TitanEmbeddings(
+        model_id=EMBEDDING_MODEL_ID,
+        client=get_bedrock_runtime_client(),
+        model_kwargs=model_kwargs,
+        embedding_type=embedding_type,
+    )
+
+
+_embeddings = {}
+_embeddings_lock = threading.Lock()
+
+
+def get_embeddings(
+    dimensions=EMBEDDING_DIMENSIONS, embedding_type=EMBEDDING_TYPE
+) -> Embeddings:
+    """Return the process-wide embeddings model for the given settings."""
+    with _embeddings_lock:
+        key = (dimensions, embedding_type)
+        if key not in _embeddings:
+            _embeddings[key] = create_embeddings(dimensions, embedding_type)
+        return _embeddings[key]
+
+
+def get_embedding_cache_model_id(embedding_type=EMBEDDING_TYPE):
+    model_id = (
+        LOCAL_EMBEDDING_MODEL_ID
+        if EMBEDDING_PROVIDER == EMBEDDING_PROVIDER_LOCAL
+        else EMBEDDING_MODEL_ID
+    )
+    # Float vectors keep the plain model id, so vectors cached before binary
+    # embeddings existed stay valid.
+    if embedding_type == EMBEDDING_TYPE_FLOAT:
+        return model_id
+    return f"{model_id}/{embedding_type}"
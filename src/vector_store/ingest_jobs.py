@@ -0,0 +1,293 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from ..config import (
+    DOCLING_PROFILE,
+    INGEST_JOB_CONCURRENCY,
+    INGEST_JOBS_DIR,
+    INGEST_JOBS_PATH,
+)
+from ..utils.download import format_download_message, get_pdf_downloader, is_url
+from ..utils.pdf import PreparedPdf
+from .qdrant_manager import (
+    count_document_points,
+    get_document_id,
+    get_document_metadata,
+    get_ingest_key,
+    ingest_pdf,
+)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+JSON_FIELDS = ("progress", "messages", "result")
+
+SKIPPED_RESULT = {"pages": 0, "chunks": 0, "reused": 0, "embedded": 0, "removed": 0}
+
+
+def ingest_source(source, status, mode, docling_profile=DOCLING_PROFILE, name=None):
+    """Ingest a PDF from a local path or a URL, returning the ``ingest_pdf`` result.
+
+    The document is identified by its title and its source: the URL, or the
+    file name of the path unless ``name`` is given (e.g. for uploads).
+
+    URLs go through the download cache. A PDF whose content is the same as
+    the last time it was ingested from that URL, into the same collection
+    with the same parser and chunker, is skipped before parsing if its points
+    are still there, with ``skipped`` set in the result.
+    """
+    start_time = time.time()
+    download = None
+
+    if is_url(source):
+        ingest_key = get_ingest_key(mode, docling_profile)
+        status.write("⚙️ Downloading PDF...")
+        download = get_pdf_downloader().download(source)
+        status.write(format_download_message(download))
+
+        document = get_pdf_downloader().get_ingested_document(
+            source, download["sha256"], ingest_key
+        )
+        if document and count_document_points(document):
+            status.write("♻️ PDF unchanged since it was last ingested, skipping.")
+            return {
+                **SKIPPED_RESULT,
+                "skipped": True,
+                "total_time": time.time() - start_time,
+            }
+
+    status.write("⚙️ Optimizing PDF...")
+    pdf_optimization_start = time.time()
+    if download:
+        path, name = download["path"], source
+    else:
+        path = source
+    with PreparedPdf.from_path(path, name=name) as pdf:
+        status.write(
+            f"✅ PDF optimization completed in {time.time() - pdf_optimization_start:.2f} seconds."
+        )
+        document = get_document_metadata(pdf)
+        result = ingest_pdf(
+            pdf, status=status, mode=mode, docling_profile=docling_profile
+        )
+
+    # Untitled documents cannot be found again, so they are never skipped.
+    if download and get_document_id(document):
+        get_pdf_downloader().mark_ingested(
+            source, download["sha256"], ingest_key, document
+        )
+
+    result["total_time"] = time.time() - start_time
+    return result
+
+
+class _JobStatus:
+    """Collects the status messages and stage progress of one job and persists them."""
+
+    def __init__(self, job_queue: "IngestJobQueue", job_id: str, messages: List[str]):
+        self.job_queue = job_queue
+        self.job_id = job_id
+        self.messages = list(messages)
+
+    def write(self, message: str):
+        self.messages.append(message)
+        self.job_queue._update(self.job_id, messages=self.messages)
+
+    def update(self, label: str = None, **kwargs):
+        if label is not None:
+            self.job_queue._update(self.job_id, label=label)
+
+    def update_stages(self, stages):
+        self.job_queue._update(
+            self.job_id,
+            progress={
+                stage.name: {
+                    "items": stage.items,
+                    "elapsed": stage.elapsed,
+                    "finished": stage.finished,
+                }
+                for stage in stages
+            },
+        )
+
+
+class IngestJobQueue:
+    """Runs PDF ingestion jobs on background threads, independent of any UI session.
+
+    Job state is kept in SQLite, so every session sees every job and the list
+    survives page reloads. Uploaded PDFs are stored next to it until their job
+    finishes; jobs that were still queued or running when the process stopped
+    are queued again on startup. At most ``max_concurrency`` jobs run at once
+    across all sessions.
+    """
+
+    def __init__(self, path: str, jobs_dir: str, max_concurrency: int):
+        self.path = path
+        self.jobs_dir = jobs_dir
+        self._lock = threading.Lock()
+
+        os.makedirs(jobs_dir, exist_ok=True)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                source TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                docling_profile TEXT NOT NULL,
+                state TEXT NOT NULL,
+                label TEXT,
+                progress TEXT NOT NULL DEFAULT '{}',
+                messages TEXT NOT NULL DEFAULT '[]',
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+            """
+        )
+        self._connection.commit()
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="ingest-job"
+        )
+        self._requeue_unfinished()
+
+    def submit_pdf(
+        self, data: bytes, name: str, mode: str, docling_profile=DOCLING_PROFILE
+    ) -> str:
+        job_id = uuid.uuid4().hex
+        source = os.path.join(self.jobs_dir, f"{job_id}.pdf")
+        with open(source, "wb") as f:
+            f.write(data)
+        return self._submit(job_id, name, source, mode, docling_profile)
+
+    def submit_url(self, url: str, mode: str, docling_profile=DOCLING_PROFILE) -> str:
+        name = os.path.basename(urlparse(url).path)
+        return self._submit(uuid.uuid4().hex, name, url, mode, docling_profile)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._to_job(row) if row else None
+
+    def list(self, limit: int = 20) -> List[dict]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def _submit(self, job_id, name, source, mode, docling_profile):
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT INTO jobs
+                (id, name, source, mode, docling_profile, state, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (job_id, name, source, mode, docling_profile, JOB_QUEUED, time.time()),
+            )
+            self._connection.commit()
+
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def _update(self, job_id: str, **fields):
+        for key in JSON_FIELDS:
+            if key in fields:
+                fields[key] = json.dumps(fields[key])
+
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._connection.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+            self._connection.commit()
+
+    @staticmethod
+    def _to_job(row) -> dict:
+        job = dict(row)
+        for key in JSON_FIELDS:
+            if job[key] is not None:
+                job[key] = json.loads(job[key])
+        return job
+
+    def _requeue_unfinished(self):
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, source FROM jobs WHERE state IN (?, ?) ORDER BY created_at",
+                (JOB_QUEUED, JOB_RUNNING),
+            ).fetchall()
+
+        for row in rows:
+            if is_url(row["source"]) or os.path.exists(row["source"]):
+                self._update(row["id"], state=JOB_QUEUED, label=None, progress={})
+                self._executor.submit(self._run, row["id"])
+            else:
+                self._update(
+                    row["id"],
+                    state=JOB_FAILED,
+                    error="The uploaded PDF is no longer available.",
+                    finished_at=time.time(),
+                )
+
+    def _run(self, job_id: str):
+        job = self.get(job_id)
+        self._update(job_id, state=JOB_RUNNING, started_at=time.time())
+        status = _JobStatus(self, job_id, job["messages"])
+
+        try:
+            result = ingest_source(
+                job["source"],
+                status,
+                mode=job["mode"],
+                docling_profile=job["docling_profile"],
+                name=job["name"],
+            )
+        except Exception as e:
+            logger.exception(f"Ingestion job {job_id} ({job['name']}) failed")
+            self._update(
+                job_id, state=JOB_FAILED, error=str(e), finished_at=time.time()
+            )
+        else:
+            self._update(job_id, state=JOB_DONE, result=result, finished_at=time.time())
+        finally:
+            if not is_url(job["source"]) and os.path.exists(job["source"]):
+                os.unlink(job["source"])
+
+
+_ingest_job_queue = None
+_ingest_job_queue_lock = threading.Lock()
+
+
+def get_ingest_job_queue() -> IngestJobQueue:
+    global _ingest_job_queue
+    with _ingest_job_queue_lock:
+        if _ingest_job_queue is None:
+            _ingest_job_queue = IngestJobQueue(
+                INGEST_JOBS_PATH, INGEST_JOBS_DIR, INGEST_JOB_CONCURRENCY
+            )
+        return _ingest_job_queue
@@ -0,0 +1,90 @@
+import asyncio
+import math
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from .sparse import tokenize
+
+LOCAL_EMBEDDING_MODEL_ID = "local-hashed-ngrams-v1"
+CHAR_NGRAM_SIZE = 3
+
+
+class LocalEmbeddings(Embeddings):
+    """Deterministic offline stand-in for Titan embeddings.
+
+    Words and their character trigrams are hashed into ``dimensions`` signed
+    buckets (the hashing trick), weighted by log term frequency and
+    normalized, so texts sharing words and word pieces get similar vectors.
+    Binary vectors keep the sign of every dimension as 0 or 1, like Titan's.
+
+    Every request waits ``latency`` seconds and fails with a throttling
+    error at ``error_rate``. Like Bedrock, one request embeds one text;
+    ``aembed_documents`` sends its texts concurrently.
+    """
+
+    def __init__(
+        self,
+        dimensions: int = 1024,
+        embedding_type: str = "float",
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.dimensions = dimensions
+        self.embedding_type = embedding_type
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def _features(self, text: str) -> Counter:
+        features = Counter()
+        for token in tokenize(text):
+            features[token] += 1
+            padded = f"<{token}>"
+            for i in range(len(padded) - CHAR_NGRAM_SIZE + 1):
+                features["#" + padded[i : i + CHAR_NGRAM_SIZE]] += 1
+        return features
+
+    def _vector(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for feature, count in self._features(text).items():
+            feature_hash = zlib.crc32(feature.encode("utf-8"))
+            sign = -1.0 if feature_hash & 0x80000000 else 1.0
+            vector[feature_hash % self.dimensions] += sign * (1 + math.log(count))
+
+        if self.embedding_type == "binary":
+            return [1.0 if value > 0 else 0.0 for value in vector]
+
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def _maybe_fail(self):
+        with self._random_lock:
+            failed = self._random.random() < self.error_rate
+        if failed:
+            raise Exception(
+                "ThrottlingException: Too many requests, please wait before trying again."
+            )
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        self._maybe_fail()
+        return self._vector(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return list(await asyncio.gather(*(self.aembed_query(text) for text in texts)))
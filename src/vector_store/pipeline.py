@@ -0,0 +1,136 @@
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator, List, Optional
+
+_END = object()
+_QUEUE_POLL_SECONDS = 0.1
+
+
+class PipelineCancelled(Exception):
+    pass
+
+
+class PipelineStage:
+    """One stage of a streaming pipeline.
+
+    The first stage's ``fn`` takes no arguments and yields items. Every other
+    stage's ``fn`` receives an iterator over the previous stage's output and
+    yields its own items. ``size`` tells how many units an output item counts
+    for in the progress counters (e.g. ``len`` for batches).
+    """
+
+    def __init__(self, name: str, fn: Callable, size: Callable = None):
+        self.name = name
+        self.fn = fn
+        self.size = size or (lambda item: 1)
+        self.items = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+
+def _put(output_queue: queue.Queue, item, stop_event: threading.Event):
+    while not stop_event.is_set():
+        try:
+            output_queue.put(item, timeout=_QUEUE_POLL_SECONDS)
+            return
+        except queue.Full:
+            continue
+    raise PipelineCancelled()
+
+
+def _iter_queue(input_queue: queue.Queue, stop_event: threading.Event) -> Iterator:
+    while True:
+        try:
+            item = input_queue.get(timeout=_QUEUE_POLL_SECONDS)
+        except queue.Empty:
+            if stop_event.is_set():
+                raise PipelineCancelled()
+            continue
+        if item is _END:
+            return
+        yield item
+
+
+def run_pipeline(
+    stages: List[PipelineStage],
+    queue_size: int,
+    on_progress: Callable[[List[PipelineStage], Optional[PipelineStage]], None] = None,
+    progress_interval: float = 0.5,
+):
+    """Run ``stages`` concurrently, each in its own thread, linked by bounded queues.
+
+    A full queue blocks the upstream stage, so a slow stage applies backpressure
+    instead of letting intermediate results pile up in memory. ``on_progress`` is
+    always called from the calling thread, periodically and once for every stage
+    that finishes (passed as the second argument). The first error raised by any
+    stage stops the pipeline and is re-raised here.
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages[1:]]
+    stop_event = threading.Event()
+    errors = []
+
+    def run_stage(index: int):
+        stage = stages[index]
+        stage.started_at = time.perf_counter()
+        try:
+            if index == 0:
+                outputs: Iterable = stage.fn()
+            else:
+                outputs = stage.fn(_iter_queue(queues[index - 1], stop_event))
+
+            for item in outputs:
+                stage.items += stage.size(item)
+                if index < len(queues):
+                    _put(queues[index], item, stop_event)
+
+            if index < len(queues):
+                _put(queues[index], _END, stop_event)
+        except PipelineCancelled:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            stop_event.set()
+        finally:
+            stage.finished_at = time.perf_counter()
+
+    threads = [
+        threading.Thread(
+            target=run_stage, args=(index,), name=f"pipeline-{stage.name}", daemon=True
+        )
+        for index, stage in enumerate(stages)
+    ]
+    for thread in threads:
+        thread.start()
+
+    reported = set()
+    while True:
+        alive = False
+        for thread in threads:
+            thread.join(timeout=progress_interval / len(threads))
+            alive = alive or thread.is_alive()
+
+        if on_progress:
+            for stage in stages:
+                if stage.finished and stage.name not in reported and not errors:
+                    reported.add(stage.name)
+                    on_progress(stages, stage)
+            on_progress(stages, None)
+
+        if not alive:
+            break
+
+    if errors:
+        raise errors[0]
+
+    return stages
@@ -1,117 +1,1041 @@
+from ..parsing.markdown_cache import get_markdown_cache
 from ..parsing.pdf_parser import (
-    convert_pdf_to_markdown_document_docling,
-    convert_pdf_to_markdown_document_pymupdf4llm,
+    assemble_docling_markdown_document,
+    convert_pdf_to_markdown_pages_docling,
+    get_parser_id,
+    iter_pdf_markdown_pages_pymupdf4llm,
 )
-from .chunk import chunk_markdown
-from qdrant_client import QdrantClient, models
+from ..utils.clients import call_qdrant, ensure_collection, get_qdrant_client
+from ..utils.download import is_url
+from ..utils.pdf import open_prepared_pdf
+from .chunk import (
+    CHUNKER_VERSION,
+    HEADERS_TO_SPLIT_ON,
+    PARENT_CONTENT_KEY,
+    PARENT_ID_KEY,
+    chunk_markdown_stream,
+)
+from .collection_profiles import (
+    get_collection_profile,
+    get_quantization_config,
+    get_search_params,
+)
+from .embedding_cache import get_embedding_cache
+from .embedding_scheduler import get_embedding_scheduler
+from .embeddings import (
+    EMBEDDING_PROVIDER_LOCAL,
+    EMBEDDING_TYPE_BINARY,
+    EMBEDDING_TYPE_FLOAT,
+    get_embeddings,
+    get_embedding_cache_model_id,
+    validate_embedding_settings,
+)
+from .pipeline import PipelineStage, run_pipeline
+from .query_cache import get_query_cache, normalize_query
+from .sparse import (
+    SPARSE_VECTOR_NAME,
+    get_document_sparse_vector,
+    get_query_sparse_vector,
+    get_sparse_vectors_config,
+)
+from .upload import PointUploader
+from ..config import (
+    DOCLING_PROFILE,
+    COLLECTION_PROFILE,
+    EMBEDDING_DIMENSIONS,
+    EMBEDDING_MAX_CONCURRENCY,
+    EMBEDDING_PROVIDER,
+    EMBEDDING_TYPE,
+    PIPELINE_EMBED_BATCH_SIZE,
+    PIPELINE_EMBED_BATCHES_IN_FLIGHT,
+    PIPELINE_PAGES_PER_SECTION,
+    PIPELINE_QUEUE_SIZE,
+    SEARCH_HNSW_EF,
+    SEARCH_HYBRID,
+)
+from qdrant_client import models
 from qdrant_client.http.models import Distance, VectorParams
-from langchain_aws import BedrockEmbeddings
 from langchain_core.documents import Document
 import time
-import asyncio
+import hashlib
+import json
+import os
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List
-from dotenv import load_dotenv
+from loguru import logger
+
+POINT_ID_NAMESPACE = uuid.UUID("6f1c0f8e-2b4a-4d57-9a0e-3c5b7d1e9f20")
+POINT_LOOKUP_BATCH_SIZE = 1000
+COLLECTION_NAME_PREFIX = "AWS_DOCS"
+# Parent chunks are stored once, as payload-only points in a collection next
+# to the children, instead of in the payload of every child.
+PARENT_COLLECTION_SUFFIX = "_PARENTS"
 
+RETRIEVAL_MODE_CHILD = "child"
+RETRIEVAL_MODE_PARENT = "parent"
+RETRIEVAL_MODE_AUTO = "auto"
+# In auto mode, a parent replaces its children once this many of them match.
+PARENT_EXPAND_MIN_HITS = 2
 
-def setup_qdrant_client():
-    load_dotenv()
+DOCUMENT_TITLE_KEY = "Document title"
+# Where a document was ingested from: its URL, or its file name. Documents
+# that share a title are told apart by it.
+DOCUMENT_SOURCE_KEY = "Document source"
+HEADER_KEYS = [header_key for _, header_key in HEADERS_TO_SPLIT_ON]
+# Keyword indexes let filtered searches only visit matching points of the HNSW
+# graph, instead of post-filtering vector matches.
+FILTER_FIELDS = [DOCUMENT_TITLE_KEY, *HEADER_KEYS]
+MAX_DOCUMENT_TITLES = 1000
+# Each side of a hybrid search contributes this many times ``limit``
+# candidates to the rank fusion.
+HYBRID_PREFETCH_FACTOR = 4
 
-    COLLECTION_NAME = "AWS_DOCS"
 
-    qdrant_client = QdrantClient(host="localhost", port=6333)
+def get_collection_name(dimensions=EMBEDDING_DIMENSIONS, embedding_type=EMBEDDING_TYPE):
+    # Vectors of the offline embedder must never mix with Titan's.
+    if EMBEDDING_PROVIDER == EMBEDDING_PROVIDER_LOCAL:
+        return f"{COLLECTION_NAME_PREFIX}_LOCAL_{dimensions}_{embedding_type.upper()}"
+    # The original 1024-dimension float collection keeps its name.
+    if dimensions == 1024 and embedding_type == EMBEDDING_TYPE_FLOAT:
+        return COLLECTION_NAME_PREFIX
+    return f"{COLLECTION_NAME_PREFIX}_{dimensions}_{embedding_type.upper()}"
 
-    if not qdrant_client.collection_exists(collection_name=COLLECTION_NAME):
-        qdrant_client.create_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=1024, distance=Distance.COSINE),
+
+def get_vector_params(
+    dimensions=EMBEDDING_DIMENSIONS, embedding_type=EMBEDDING_TYPE, on_disk=False
+):
+    if embedding_type == EMBEDDING_TYPE_BINARY:
+        # One byte per bit; Manhattan distance between 0/1 vectors is their
+        # Hamming distance.
+        return VectorParams(
+            size=dimensions,
+            distance=Distance.MANHATTAN,
+            datatype=models.Datatype.UINT8,
+            on_disk=on_disk,
         )
+    return VectorParams(size=dimensions, distance=Distance.COSINE, on_disk=on_disk)
 
-    return qdrant_client, COLLECTION_NAME
 
+def get_collection_config(
+    dimensions=EMBEDDING_DIMENSIONS,
+    embedding_type=EMBEDDING_TYPE,
+    profile=COLLECTION_PROFILE,
+):
+    """Return the ``create_collection`` arguments for the settings and profile."""
+    settings = get_collection_profile(profile)
+    if settings["quantization"] and embedding_type == EMBEDDING_TYPE_BINARY:
+        raise ValueError(
+            f"The {profile!r} collection profile quantizes vectors, which binary embeddings already are."
+        )
 
-async def _async_embed_texts(texts: List[str]) -> List[List[float]]:
-    embeddings = BedrockEmbeddings(model_id="amazon.titan-embed-text-v2:0")
-    return await embeddings.aembed_documents(texts)
+    return {
+        "vectors_config": get_vector_params(
+            dimensions, embedding_type, on_disk=settings["on_disk"]
+        ),
+        "on_disk_payload": settings["on_disk_payload"],
+        "quantization_config": get_quantization_config(profile),
+        "sparse_vectors_config": get_sparse_vectors_config(),
+    }
 
 
-def ingest_chunks_from_pdf(location, status=None, mode="regular"):
-    start_time = time.time()
+def setup_qdrant_client(dimensions=EMBEDDING_DIMENSIONS, embedding_type=EMBEDDING_TYPE):
+    """Return the shared Qdrant client and the collection for the embedding
+    settings. The collection is checked, and created with matching vector
+    params and the configured collection profile, once per connection."""
+    client, collection_name, _ = _setup_collection(dimensions, embedding_type)
+    return client, collection_name
 
-    if status:
-        status.write("⚙️ Parsing PDF...")
-    parse_start = time.time()
-    markdown_document = None
+
+def _setup_collection(dimensions=EMBEDDING_DIMENSIONS, embedding_type=EMBEDDING_TYPE):
+    validate_embedding_settings(dimensions, embedding_type)
+    collection_name = get_collection_name(dimensions, embedding_type)
+
+    collection_params = ensure_collection(
+        collection_name,
+        payload_indexes={
+            payload_key(field_name): models.PayloadSchemaType.KEYWORD
+            for field_name in [*FILTER_FIELDS, DOCUMENT_SOURCE_KEY]
+        },
+        **get_collection_config(dimensions, embedding_type),
+    )
+    # Collections created before sparse vectors were added have none, and
+    # Qdrant cannot add them to an existing collection.
+    has_sparse_vectors = SPARSE_VECTOR_NAME in (collection_params.sparse_vectors or {})
+
+    return get_qdrant_client(), collection_name, has_sparse_vectors
+
+
+def get_parent_collection_name(collection_name):
+    return f"{collection_name}{PARENT_COLLECTION_SUFFIX}"
+
+
+def _setup_parent_collection(collection_name):
+    parent_collection_name = get_parent_collection_name(collection_name)
+    ensure_collection(
+        parent_collection_name,
+        payload_indexes={
+            payload_key(field_name): models.PayloadSchemaType.KEYWORD
+            for field_name in (DOCUMENT_TITLE_KEY, DOCUMENT_SOURCE_KEY)
+        },
+        vectors_config={},
+    )
+    return parent_collection_name
+
+
+def payload_key(field_name):
+    # Payload keys are JSON paths, so field names with spaces must be quoted.
+    return f'"{field_name}"'
+
+
+def list_document_titles(client, collection_name):
+    """Return the titles of all ingested documents, read from the title index."""
+    hits = client.facet(
+        collection_name=collection_name,
+        key=payload_key(DOCUMENT_TITLE_KEY),
+        limit=MAX_DOCUMENT_TITLES,
+    ).hits
+    return sorted(hit.value for hit in hits)
+
+
+def build_search_filter(
+    client, collection_name, document_titles=None, service=None, header_path=None
+):
+    """Return a Qdrant filter restricting a search, or None for no restriction.
+
+    ``document_titles`` keeps chunks of those exact documents. ``service``
+    keeps documents whose title mentions it, e.g. ``"Lambda"`` for the
+    "AWS Lambda Developer Guide". ``header_path`` keeps chunks under every one
+    of the given headings; each may be at any header level, as PDFs often
+    skip levels.
+    """
+    conditions = []
+
+    if document_titles:
+        conditions.append(
+            models.FieldCondition(
+                key=payload_key(DOCUMENT_TITLE_KEY),
+                match=models.MatchAny(any=list(document_titles)),
+            )
+        )
+
+    if service:
+        available_titles = list_document_titles(client, collection_name)
+        service_titles = [
+            title for title in available_titles if service.lower() in title.lower()
+        ]
+        if not service_titles:
+            raise ValueError(
+                f"No ingested document mentions {service!r} in its title. "
+                f"Available documents: {', '.join(available_titles) or 'none'}."
+            )
+        conditions.append(
+            models.FieldCondition(
+                key=payload_key(DOCUMENT_TITLE_KEY),
+                match=models.MatchAny(any=service_titles),
+            )
+        )
+
+    for heading in header_path or []:
+        conditions.append(
+            models.Filter(
+                should=[
+                    models.FieldCondition(
+                        key=payload_key(header_key),
+                        match=models.MatchValue(value=heading),
+                    )
+                    for header_key in HEADER_KEYS
+                ]
+            )
+        )
+
+    if not conditions:
+        return None
+    return models.Filter(must=conditions)
+
+
+def get_document_metadata(pdf):
+    """Return the title and source that identify a PDF's document."""
+    source = pdf.name if is_url(pdf.name) else os.path.basename(pdf.name)
+    return {DOCUMENT_TITLE_KEY: pdf.title, DOCUMENT_SOURCE_KEY: source}
+
+
+def get_document_id(metadata):
+    """Identify a document by its title and source.
+
+    Untitled documents have no id, so a new version of one cannot replace the
+    old one.
+    """
+    title = (metadata.get(DOCUMENT_TITLE_KEY) or "").strip()
+    if not title or title == "Untitled":
+        return None
+    return json.dumps([metadata.get(DOCUMENT_SOURCE_KEY) or "", title])
+
+
+def get_chunk_point_id(document_id, text, metadata):
+    headers = sorted((k, v) for k, v in metadata.items() if k.startswith("Header "))
+    # A child chunk links to its parent by id, which changes with the parent's
+    # text, so a changed parent must give its unchanged children new points.
+    content_hash = hashlib.sha256(
+        json.dumps(
+            [headers, metadata.get(PARENT_ID_KEY), text], ensure_ascii=False
+        ).encode("utf-8")
+    ).hexdigest()
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{document_id or ''}:{content_hash}"))
+
+
+def get_parent_point_id(document_id, parent_id):
+    return str(
+        uuid.uuid5(POINT_ID_NAMESPACE, f"parent:{document_id or ''}:{parent_id}")
+    )
+
+
+def _get_existing_point_ids(client, collection_name, point_ids):
+    existing_ids = set()
+    for i in range(0, len(point_ids), POINT_LOOKUP_BATCH_SIZE):
+        records = client.retrieve(
+            collection_name=collection_name,
+            ids=point_ids[i : i + POINT_LOOKUP_BATCH_SIZE],
+            with_payload=False,
+            with_vectors=False,
+        )
+        existing_ids.update(str(record.id) for record in records)
+    return existing_ids
+
+
+def count_document_points(document):
+    """Return roughly how many points the collection holds for a document,
+    given its ``get_document_metadata``."""
+
+    def count():
+        client, collection_name = setup_qdrant_client()
+        return client.count(
+            collection_name=collection_name,
+            count_filter=_document_filter(document),
+            exact=False,
+        ).count
+
+    return call_qdrant(count)
+
+
+def get_ingest_key(mode, docling_profile=DOCLING_PROFILE):
+    """Identify where and how a PDF is ingested: the collection, the parser
+    and its settings, and the chunker version."""
+    return (
+        f"{get_collection_name()}/{get_parser_id(mode, docling_profile)}"
+        f"/chunker-v{CHUNKER_VERSION}"
+    )
+
+
+def _document_filter(document):
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key=payload_key(field_name),
+                match=models.MatchValue(value=document[field_name]),
+            )
+            for field_name in (DOCUMENT_TITLE_KEY, DOCUMENT_SOURCE_KEY)
+        ]
+    )
+
+
+def _legacy_document_filter(document):
+    # Points ingested before sources were recorded only have a title; the
+    # first document ingested with that title replaces them.
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key=payload_key(DOCUMENT_TITLE_KEY),
+                match=models.MatchValue(value=document[DOCUMENT_TITLE_KEY]),
+            ),
+            models.IsEmptyCondition(
+                is_empty=models.PayloadField(key=payload_key(DOCUMENT_SOURCE_KEY))
+            ),
+        ]
+    )
+
+
+def _get_document_point_ids(client, collection_name, document):
+    point_ids = set()
+    for document_filter in (
+        _document_filter(document),
+        _legacy_document_filter(document),
+    ):
+        point_ids.update(_scroll_point_ids(client, collection_name, document_filter))
+    return point_ids
+
+
+def _scroll_point_ids(client, collection_name, document_filter):
+    point_ids = set()
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=document_filter,
+            limit=POINT_LOOKUP_BATCH_SIZE,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        point_ids.update(record.id for record in records)
+        if offset is None:
+            break
+    return point_ids
+
+
+def _submit_embed_texts(
+    texts: List[str],
+    dimensions=EMBEDDING_DIMENSIONS,
+    embedding_type=EMBEDDING_TYPE,
+) -> Future:
+    """Start embedding ``texts``, returning a future of their vectors.
+
+    Cached vectors are reused and new ones are cached once they all arrive.
+    Cancelling the future stops the requests that have not started yet.
+    """
+    cache = get_embedding_cache()
+    cache_model_id = get_embedding_cache_model_id(embedding_type)
+    vectors = cache.get_many(cache_model_id, dimensions, texts)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+    result = Future()
+    if not missing:
+        result.set_result(vectors)
+        return result
+
+    missing_texts = [texts[i] for i in missing]
+    embedding = get_embedding_scheduler(dimensions, embedding_type).submit(
+        missing_texts
+    )
+
+    def on_embedded(embedding):
+        if embedding.cancelled():
+            result.cancel()
+        elif embedding.exception() is not None:
+            result.set_exception(embedding.exception())
+        else:
+            new_vectors = embedding.result()
+            try:
+                cache.put_many(cache_model_id, dimensions, missing_texts, new_vectors)
+            except Exception as e:
+                result.set_exception(e)
+                return
+            for i, vector in zip(missing, new_vectors):
+                vectors[i] = vector
+            result.set_result(vectors)
+
+    embedding.add_done_callback(on_embedded)
+    result.add_done_callback(
+        lambda result: embedding.cancel() if result.cancelled() else None
+    )
+    return result
+
+
+def _embed_texts(
+    texts: List[str],
+    dimensions=EMBEDDING_DIMENSIONS,
+    embedding_type=EMBEDDING_TYPE,
+) -> List[List[float]]:
+    return _submit_embed_texts(texts, dimensions, embedding_type).result()
+
+
+def _embed_query(
+    query_text: str, dimensions=EMBEDDING_DIMENSIONS, embedding_type=EMBEDDING_TYPE
+) -> List[float]:
+    [vector] = _embed_queries([query_text], dimensions, embedding_type)
+    return vector
+
+
+def _embed_queries(
+    query_texts: List[str],
+    dimensions=EMBEDDING_DIMENSIONS,
+    embedding_type=EMBEDDING_TYPE,
+) -> List[List[float]]:
+    cache = get_embedding_cache()
+    cache_model_id = get_embedding_cache_model_id(embedding_type)
+    vectors = cache.get_many(cache_model_id, dimensions, query_texts)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+    if missing:
+        missing_texts = [query_texts[i] for i in missing]
+        embeddings = get_embeddings(dimensions, embedding_type)
+        # Titan embeds one text per request, so cache misses are embedded
+        # concurrently over the shared Bedrock client.
+        with ThreadPoolExecutor(
+            max_workers=min(len(missing_texts), EMBEDDING_MAX_CONCURRENCY)
+        ) as executor:
+            new_vectors = list(executor.map(embeddings.embed_query, missing_texts))
+        cache.put_many(cache_model_id, dimensions, missing_texts, new_vectors)
+        for i, vector in zip(missing, new_vectors):
+            vectors[i] = vector
+
+    return vectors
+
+
+STAGE_LABELS = {
+    "parse": "Parsing PDF",
+    "chunk": "Chunking text",
+    "embed": "Generating vectors",
+    "upsert": "Storing vectors",
+}
+
+
+def _iter_markdown_sections(pdf, mode, docling_profile):
+    """Yield the PDF's markdown in sections, from the markdown cache when possible."""
+    cache = get_markdown_cache()
+    parser_id = get_parser_id(mode, docling_profile)
+
+    cached_sections = cache.get(pdf.content_hash, parser_id)
+    if cached_sections is not None:
+        logger.info(f"Reusing cached {parser_id} markdown for {pdf.name}")
+        yield from cached_sections
+        return
+
+    sections = []
+    for section in _parse_markdown_sections(pdf, mode, docling_profile):
+        sections.append(section)
+        yield section
+
+    # Only a parse that ran to the end is cached; a cancelled pipeline closes
+    # this generator at the yield above.
+    cache.put(pdf.content_hash, parser_id, sections)
+
+
+def _parse_markdown_sections(pdf, mode, docling_profile):
+    """Parse the PDF into markdown sections, reusing the unchanged pages of the
+    document's previous parse.
+
+    Documents are identified by title and source, so a revised version of a
+    document only converts the pages whose fingerprint changed.
+    """
+    cache = get_markdown_cache()
+    parser_id = get_parser_id(mode, docling_profile)
+    document_id = get_document_id(get_document_metadata(pdf))
+    previous_pages = cache.get_pages(document_id, parser_id) if document_id else {}
+    pages = {}
 
     if "fast" in mode:
-        markdown_document = convert_pdf_to_markdown_document_pymupdf4llm(location)
+        page_batches = _batched(
+            iter_pdf_markdown_pages_pymupdf4llm(pdf, previous_pages),
+            PIPELINE_PAGES_PER_SECTION,
+        )
+        for batch in page_batches:
+            pages.update((fingerprint, markdown) for _, fingerprint, markdown in batch)
+            yield "".join(markdown for _, _, markdown in batch)
     elif "regular" in mode:
-        markdown_document = convert_pdf_to_markdown_document_docling(location)
+        # Docling converts the whole document at once; downstream stages still
+        # overlap with each other.
+        docling_pages = convert_pdf_to_markdown_pages_docling(
+            pdf, docling_profile, previous_pages
+        )
+        pages.update(
+            (fingerprint, markdown) for _, fingerprint, markdown in docling_pages
+        )
+        yield assemble_docling_markdown_document(docling_pages, pdf.toc)
 
-    parse_time = time.time() - parse_start
-    if status:
-        status.write(f"✅ PDF Parsed successfully in {parse_time:.2f} seconds.")
+    if document_id:
+        cache.put_pages(document_id, parser_id, pages)
 
-    if status:
-        status.write("⚙️ Chunking text...")
-    chunk_start = time.time()
 
-    text_chunks, metadatas = chunk_markdown(markdown_document, location)
-    chunk_time = time.time() - chunk_start
-    if status:
-        status.write(f"✅ Text chunked successfully in {chunk_time:.2f} seconds.")
+def _batched(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
-    if status:
-        status.write("⚙️ Generating vectors...")
-    vector_start = time.time()
 
-    client, collection_name = setup_qdrant_client()
+def _report_pipeline_progress(status, stages, finished_stage):
+    if hasattr(status, "update_stages"):
+        status.update_stages(stages)
+
+    if finished_stage is not None:
+        rate = finished_stage.items / max(finished_stage.elapsed, 1e-9)
+        status.write(
+            f"✅ {STAGE_LABELS[finished_stage.name]} finished in {finished_stage.elapsed:.2f} seconds ({finished_stage.items} items, {rate:.1f}/s)."
+        )
+    elif hasattr(status, "update"):
+        progress = " | ".join(f"{stage.name}: {stage.items}" for stage in stages)
+        status.update(label=f"Processing PDF... {progress}")
+
+
+def ingest_pdf(location, status=None, mode="regular", docling_profile=DOCLING_PROFILE):
+    """Parse, chunk, embed and store a PDF, returning counts and timings.
+
+    ``location`` is either a path or a ``PreparedPdf``; the PDF is opened once
+    and shared by every parsing step. The result has ``pages``, ``chunks``,
+    ``reused``, ``embedded``, ``removed`` and ``total_time``.
+    """
+    start_time = time.time()
+
+    with open_prepared_pdf(location) as pdf:
+        result = _ingest_prepared_pdf(pdf, status, mode, docling_profile)
+
+    result["total_time"] = time.time() - start_time
+    return result
+
 
-    embeddings = asyncio.run(_async_embed_texts(text_chunks))
+def _ingest_prepared_pdf(pdf, status, mode, docling_profile):
+    client, collection_name, has_sparse_vectors = _setup_collection()
+    parent_collection_name = _setup_parent_collection(collection_name)
+    title = pdf.title
+    document = get_document_metadata(pdf)
+    document_id = get_document_id(document)
 
-    points = []
-    for i in range(len(text_chunks)):
-        points.append(
+    seen_ids = set()
+    seen_parent_ids = set()
+    counts = {"reused": 0, "embedded": 0}
+
+    def parse_stage():
+        yield from _iter_markdown_sections(pdf, mode, docling_profile)
+
+    def chunk_stage(sections):
+        for text_chunks, metadatas in chunk_markdown_stream(sections, title):
+            for text, metadata in zip(text_chunks, metadatas):
+                metadata[DOCUMENT_SOURCE_KEY] = document[DOCUMENT_SOURCE_KEY]
+                point_id = get_chunk_point_id(document_id, text, metadata)
+                if point_id in seen_ids:
+                    continue
+                seen_ids.add(point_id)
+                yield point_id, text, metadata
+
+    def store_parents(batch):
+        parents = {}
+        for _, _, metadata in batch:
+            parent_point_id = get_parent_point_id(document_id, metadata[PARENT_ID_KEY])
+            if parent_point_id not in seen_parent_ids:
+                seen_parent_ids.add(parent_point_id)
+                parents[parent_point_id] = metadata
+
+        # Unchanged children keep their parent, unless it was never stored.
+        existing_ids = _get_existing_point_ids(
+            client, parent_collection_name, list(parents)
+        )
+        new_parents = [
             models.PointStruct(
-                id=i,
-                payload={"page_content": text_chunks[i], **metadatas[i]},
-                vector=embeddings[i],
+                id=parent_point_id,
+                payload={
+                    "page_content": metadata[PARENT_CONTENT_KEY],
+                    DOCUMENT_TITLE_KEY: metadata[DOCUMENT_TITLE_KEY],
+                    DOCUMENT_SOURCE_KEY: metadata[DOCUMENT_SOURCE_KEY],
+                    PARENT_ID_KEY: metadata[PARENT_ID_KEY],
+                },
+                vector={},
             )
-        )
+            for parent_point_id, metadata in parents.items()
+            if parent_point_id not in existing_ids
+        ]
+        if new_parents:
+            client.upsert(collection_name=parent_collection_name, points=new_parents)
+
+    def to_points(chunks, embeddings):
+        return [
+            models.PointStruct(
+                id=point_id,
+                payload={
+                    "page_content": text,
+                    **{
+                        key: value
+                        for key, value in metadata.items()
+                        if key != PARENT_CONTENT_KEY
+                    },
+                },
+                vector={
+                    "": embedding,
+                    SPARSE_VECTOR_NAME: get_document_sparse_vector(text),
+                }
+                if has_sparse_vectors
+                else embedding,
+            )
+            for (point_id, text, metadata), embedding in zip(chunks, embeddings)
+        ]
+
+    def embed_stage(chunks):
+        # Batches are embedded in the background by the shared scheduler, so
+        # the requests of the next batches start while earlier ones finish.
+        in_flight = deque()
+        try:
+            for batch in _batched(chunks, PIPELINE_EMBED_BATCH_SIZE):
+                store_parents(batch)
+                existing_ids = _get_existing_point_ids(
+                    client, collection_name, [point_id for point_id, _, _ in batch]
+                )
+                new_chunks = [chunk for chunk in batch if chunk[0] not in existing_ids]
+                counts["reused"] += len(batch) - len(new_chunks)
+                if new_chunks:
+                    in_flight.append(
+                        (
+                            new_chunks,
+                            _submit_embed_texts([text for _, text, _ in new_chunks]),
+                        )
+                    )
+
+                while in_flight and (
+                    len(in_flight) > PIPELINE_EMBED_BATCHES_IN_FLIGHT
+                    or in_flight[0][1].done()
+                ):
+                    new_chunks, embedding = in_flight.popleft()
+                    yield to_points(new_chunks, embedding.result())
+                    counts["embedded"] += len(new_chunks)
+
+            while in_flight:
+                new_chunks, embedding = in_flight.popleft()
+                yield to_points(new_chunks, embedding.result())
+                counts["embedded"] += len(new_chunks)
+        finally:
+            for _, embedding in in_flight:
+                embedding.cancel()
 
-    client.upsert(collection_name=collection_name, points=points)
+    def upsert_stage(point_batches):
+        with PointUploader(client, collection_name) as uploader:
+            for points in point_batches:
+                uploader.add(points)
+                yield points
+
+    def on_progress(stages, finished_stage):
+        if status:
+            _report_pipeline_progress(status, stages, finished_stage)
 
-    vector_time = time.time() - vector_start
     if status:
-        status.write(
-            f"✅ Generated and stored vectors successfully in {vector_time:.2f} seconds!"
+        status.write("⚙️ Parsing, chunking and vectorizing PDF...")
+
+    stale_ids = []
+    try:
+        run_pipeline(
+            [
+                PipelineStage("parse", parse_stage),
+                PipelineStage("chunk", chunk_stage),
+                PipelineStage("embed", embed_stage, size=len),
+                PipelineStage("upsert", upsert_stage, size=len),
+            ],
+            queue_size=PIPELINE_QUEUE_SIZE,
+            on_progress=on_progress,
         )
 
-    total_time = time.time() - start_time
-    return total_time
+        if status:
+            status.write(
+                f"♻️ {counts['reused']} unchanged chunks reused, {counts['embedded']} new or changed chunks embedded."
+            )
 
+        if document_id is not None:
+            stale_ids = [
+                point_id
+                for point_id in _get_document_point_ids(
+                    client, collection_name, document
+                )
+                if str(point_id) not in seen_ids
+            ]
+            if stale_ids:
+                client.delete(
+                    collection_name=collection_name,
+                    points_selector=models.PointIdsList(points=stale_ids),
+                )
+                if status:
+                    status.write(f"🧹 Removed {len(stale_ids)} stale chunks.")
 
-def search_vectors(query_text, limit=10):
-    client, collection_name = setup_qdrant_client()
-    embeddings = BedrockEmbeddings(model_id="amazon.titan-embed-text-v2:0")
+            stale_parent_ids = [
+                point_id
+                for point_id in _get_document_point_ids(
+                    client, parent_collection_name, document
+                )
+                if str(point_id) not in seen_parent_ids
+            ]
+            if stale_parent_ids:
+                client.delete(
+                    collection_name=parent_collection_name,
+                    points_selector=models.PointIdsList(points=stale_parent_ids),
+                )
+    finally:
+        # Cached search results from before this ingestion, even a failed
+        # one, must not be served again.
+        if counts["embedded"] or stale_ids:
+            get_query_cache().bump_version(collection_name)
 
-    query_embedding = embeddings.embed_query(query_text)
+    return {
+        "pages": pdf.page_count,
+        "chunks": len(seen_ids),
+        "reused": counts["reused"],
+        "embedded": counts["embedded"],
+        "removed": len(stale_ids),
+    }
 
-    search_result = client.search(
-        collection_name=collection_name,
-        query_vector=query_embedding,
+
+def search_vectors(
+    query_text,
+    limit=10,
+    retrieval_mode=RETRIEVAL_MODE_CHILD,
+    hnsw_ef=SEARCH_HNSW_EF,
+    document_titles=None,
+    service=None,
+    header_path=None,
+    hybrid=SEARCH_HYBRID,
+):
+    """Search the collection, returning matches as ``Document`` objects.
+
+    Matches are the small child chunks. ``retrieval_mode`` widens them to the
+    parent section they belong to: ``"parent"`` always does, ``"auto"`` only
+    when at least ``PARENT_EXPAND_MIN_HITS`` children of the same parent
+    match. Children of an expanded parent collapse into a single result.
+    ``hnsw_ef`` trades latency for recall; None uses the collection default.
+    ``document_titles``, ``service`` and ``header_path`` restrict the search,
+    see ``build_search_filter``.
+
+    With ``hybrid``, dense matches and BM25 matches on the sparse vectors are
+    fused with Reciprocal Rank Fusion in a single Qdrant query, so exact
+    identifiers like API names or error codes are found even when their
+    embeddings are not close to the query's.
+    """
+    [results] = search_vectors_batch(
+        [query_text],
         limit=limit,
-        with_payload=True,
+        retrieval_mode=retrieval_mode,
+        hnsw_ef=hnsw_ef,
+        document_titles=document_titles,
+        service=service,
+        header_path=header_path,
+        hybrid=hybrid,
     )
+    return results
 
-    results = []
-    for scored_point in search_result:
-        payload = scored_point.payload
-        page_content = payload.pop("page_content")
 
-        doc = Document(
-            page_content=page_content,
-            metadata=payload,
+def search_vectors_batch(
+    query_texts,
+    limit=10,
+    retrieval_mode=RETRIEVAL_MODE_CHILD,
+    hnsw_ef=SEARCH_HNSW_EF,
+    document_titles=None,
+    service=None,
+    header_path=None,
+    hybrid=SEARCH_HYBRID,
+):
+    """Run several searches at once, returning a list of results per query.
+
+    All queries are embedded together, through the embedding cache, and sent
+    to Qdrant as one batch request; parents of all queries are fetched in one
+    more request. The options are those of ``search_vectors`` and apply to
+    every query.
+
+    Results are cached per collection version, see ``QueryCache``; only
+    queries missing from the cache are embedded and searched.
+    """
+    if not query_texts:
+        return []
+
+    cache = get_query_cache()
+    collection_name = get_collection_name()
+    # Read before searching, so results racing an ingestion are not reused.
+    version = cache.get_version(collection_name)
+    options = (
+        limit,
+        retrieval_mode,
+        hnsw_ef,
+        tuple(sorted(document_titles or [])),
+        (service or "").casefold(),
+        tuple(header_path or []),
+        hybrid,
+    )
+    cache_keys = [(normalize_query(query_text), options) for query_text in query_texts]
+
+    results = [cache.get(collection_name, version, key) for key in cache_keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if not missing:
+        return results
+
+    start_time = time.perf_counter()
+    missing_results = _search_vectors_batch(
+        [query_texts[i] for i in missing],
+        limit,
+        retrieval_mode,
+        hnsw_ef,
+        document_titles,
+        service,
+        header_path,
+        hybrid,
+    )
+    search_seconds = (time.perf_counter() - start_time) / len(missing)
+
+    for i, result in zip(missing, missing_results):
+        cache.put(collection_name, version, cache_keys[i], result, search_seconds)
+        results[i] = result
+
+    return results
+
+
+def _search_vectors_batch(
+    query_texts,
+    limit,
+    retrieval_mode,
+    hnsw_ef,
+    document_titles,
+    service,
+    header_path,
+    hybrid,
+):
+    query_embeddings = _embed_queries(list(query_texts))
+
+    def search():
+        client, collection_name, has_sparse_vectors = _setup_collection()
+        query_filter = build_search_filter(
+            client, collection_name, document_titles, service, header_path
         )
-        results.append(doc)
+        search_params = get_search_params(hnsw_ef=hnsw_ef)
+
+        responses = client.query_batch_points(
+            collection_name=collection_name,
+            requests=[
+                _build_query_request(
+                    query_text,
+                    query_embedding,
+                    limit,
+                    query_filter,
+                    search_params,
+                    hybrid and has_sparse_vectors,
+                )
+                for query_text, query_embedding in zip(query_texts, query_embeddings)
+            ],
+        )
+        search_results = [response.points for response in responses]
+
+        if retrieval_mode != RETRIEVAL_MODE_CHILD:
+            return _expand_to_parents(
+                client, collection_name, search_results, retrieval_mode
+            )
+
+        return [
+            [_to_document(scored_point.payload) for scored_point in search_result]
+            for search_result in search_results
+        ]
+
+    return call_qdrant(search)
+
+
+def _build_query_request(
+    query_text, query_embedding, limit, query_filter, search_params, hybrid
+):
+    # Search results never need the parent text that older children carry.
+    with_payload = models.PayloadSelectorExclude(exclude=[PARENT_CONTENT_KEY])
+
+    if not hybrid:
+        return models.QueryRequest(
+            query=query_embedding,
+            filter=query_filter,
+            params=search_params,
+            limit=limit,
+            with_payload=with_payload,
+        )
+
+    prefetch_limit = limit * HYBRID_PREFETCH_FACTOR
+    return models.QueryRequest(
+        prefetch=[
+            models.Prefetch(
+                query=query_embedding,
+                filter=query_filter,
+                params=search_params,
+                limit=prefetch_limit,
+            ),
+            models.Prefetch(
+                query=get_query_sparse_vector(query_text),
+                using=SPARSE_VECTOR_NAME,
+                filter=query_filter,
+                limit=prefetch_limit,
+            ),
+        ],
+        query=models.FusionQuery(fusion=models.Fusion.RRF),
+        limit=limit,
+        with_payload=with_payload,
+    )
+
+
+def _to_document(payload, page_content=None):
+    metadata = dict(payload)
+    text = metadata.pop("page_content")
+    return Document(
+        page_content=text if page_content is None else page_content,
+        metadata=metadata,
+    )
+
+
+def _should_expand(hits, retrieval_mode):
+    return bool(hits[0].payload.get(PARENT_ID_KEY)) and (
+        retrieval_mode == RETRIEVAL_MODE_PARENT or len(hits) >= PARENT_EXPAND_MIN_HITS
+    )
+
+
+def _get_parent_key(scored_point):
+    # Points ingested before parent chunks existed are their own parent.
+    parent_id = scored_point.payload.get(PARENT_ID_KEY)
+    if not parent_id:
+        return str(scored_point.id)
+    return get_parent_point_id(get_document_id(scored_point.payload), parent_id)
+
+
+def _expand_to_parents(client, collection_name, search_results, retrieval_mode):
+    # Hits are grouped by parent point, so documents that share a title and
+    # a section never share a parent.
+    query_groups = []
+    for search_result in search_results:
+        groups = {}
+        for scored_point in search_result:
+            groups.setdefault(_get_parent_key(scored_point), []).append(scored_point)
+        query_groups.append(groups)
+
+    # One point per parent to expand, across all queries.
+    expanded_hits = {
+        parent_key: hits[0]
+        for groups in query_groups
+        for parent_key, hits in groups.items()
+        if _should_expand(hits, retrieval_mode)
+    }
+
+    parent_contents = {}
+    if expanded_hits:
+        records = client.retrieve(
+            collection_name=_setup_parent_collection(collection_name),
+            ids=list(expanded_hits),
+            with_payload=["page_content"],
+            with_vectors=False,
+        )
+        parent_contents = {
+            str(record.id): record.payload["page_content"] for record in records
+        }
+
+    # Children ingested before parents had their own collection carry the
+    # parent's text themselves.
+    legacy_parent_keys = {
+        hit.id: parent_key
+        for parent_key, hit in expanded_hits.items()
+        if parent_key not in parent_contents
+    }
+    if legacy_parent_keys:
+        records = client.retrieve(
+            collection_name=collection_name,
+            ids=list(legacy_parent_keys),
+            with_payload=[PARENT_CONTENT_KEY],
+            with_vectors=False,
+        )
+        parent_contents.update(
+            (legacy_parent_keys[record.id], record.payload[PARENT_CONTENT_KEY])
+            for record in records
+            if PARENT_CONTENT_KEY in record.payload
+        )
+
+    results = []
+    for groups in query_groups:
+        documents = []
+        for parent_key, hits in groups.items():
+            if parent_key in parent_contents and _should_expand(hits, retrieval_mode):
+                document = _to_document(hits[0].payload, parent_contents[parent_key])
+                document.metadata["Matched chunks"] = len(hits)
+                documents.append(document)
+                continue
+
+            documents.extend(
+                _to_document(scored_point.payload) for scored_point in hits
+            )
+        results.append(documents)
 
     return results
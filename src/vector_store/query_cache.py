@@ -0,0 +1,143 @@
+import copy
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from ..config import (
+    QUERY_CACHE_MAX_ENTRIES,
+    QUERY_CACHE_TTL_SECONDS,
+    QUERY_CACHE_VERSIONS_PATH,
+)
+
+# Ingestion from the bulk CLI runs in other processes than the app.
+SQLITE_BUSY_TIMEOUT_SECONDS = 30
+
+
+def normalize_query(query_text: str) -> str:
+    return " ".join(query_text.split()).casefold()
+
+
+class QueryCache:
+    """In-process LRU cache of search results, keyed per collection version.
+
+    Collection versions live in a small SQLite file shared by every process,
+    and ingestion bumps a collection's version whenever it writes or deletes
+    points. Results are only served for the version they were computed at,
+    so a search never returns results from before an ingestion. Entries also
+    expire after ``ttl_seconds``, which covers changes made outside lumen.
+    """
+
+    def __init__(self, versions_path: str, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(versions_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(
+            versions_path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS collection_versions (
+                collection_name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def get_version(self, collection_name: str) -> int:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version FROM collection_versions WHERE collection_name = ?",
+                (collection_name,),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump_version(self, collection_name: str):
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT INTO collection_versions (collection_name, version)
+                VALUES (?, 1)
+                ON CONFLICT (collection_name) DO UPDATE SET version = version + 1
+                """,
+                (collection_name,),
+            )
+            self._connection.commit()
+
+    def get(self, collection_name: str, version: int, key):
+        """Return a copy of the cached results, or None."""
+        with self._lock:
+            entry = self._entries.get((collection_name, key))
+            if (
+                entry is None
+                or entry["version"] != version
+                or time.monotonic() - entry["stored_at"] > self.ttl_seconds
+            ):
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end((collection_name, key))
+            self.hits += 1
+            self.saved_seconds += entry["search_seconds"]
+            results = entry["results"]
+
+        # Callers may change the returned documents.
+        return copy.deepcopy(results)
+
+    def put(
+        self, collection_name: str, version: int, key, results, search_seconds: float
+    ):
+        """Cache ``results``, computed at ``version`` in ``search_seconds``.
+
+        ``version`` must be read before searching, so results that raced an
+        ingestion are stored under the old version and never served.
+        """
+        with self._lock:
+            self._entries[(collection_name, key)] = {
+                "version": version,
+                "stored_at": time.monotonic(),
+                "results": copy.deepcopy(results),
+                "search_seconds": search_seconds,
+            }
+            self._entries.move_to_end((collection_name, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "saved_seconds": self.saved_seconds,
+        }
+
+
+_query_cache = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryCache:
+    global _query_cache
+    with _query_cache_lock:
+        if _query_cache is None:
+            _query_cache = QueryCache(
+                QUERY_CACHE_VERSIONS_PATH,
+                QUERY_CACHE_MAX_ENTRIES,
+                QUERY_CACHE_TTL_SECONDS,
+            )
+        return _query_cache
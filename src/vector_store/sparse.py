@@ -0,0 +1,69 @@
+import re
+import zlib
+from collections import Counter
+
+from qdrant_client import models
+
+SPARSE_VECTOR_NAME = "bm25"
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Average number of lexical tokens in a child chunk; only its order of
+# magnitude matters for the length normalization.
+BM25_AVG_DOC_TOKENS = 120
+
+# Identifiers such as "s3:GetObject", "dry-run", "us-east-1" or
+# "AWS::Lambda::Function" stay whole, and each of their parts is indexed too,
+# so "GetObject" alone matches as well.
+_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+(?:[:_\-./]+[A-Za-z0-9]+)*")
+_PART_PATTERN = re.compile(r"[A-Za-z0-9]+")
+
+
+def tokenize(text):
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        token = match.group().lower()
+        tokens.append(token)
+        parts = _PART_PATTERN.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def _token_index(token):
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def _to_sparse_vector(weights):
+    # Distinct tokens may share a hash; their weights are added up.
+    merged = Counter()
+    for token, weight in weights.items():
+        merged[_token_index(token)] += weight
+    indices = sorted(merged)
+    return models.SparseVector(
+        indices=indices, values=[float(merged[i]) for i in indices]
+    )
+
+
+def get_document_sparse_vector(text):
+    """Return the BM25 term-frequency part of a chunk's sparse vector.
+
+    The IDF part is applied by Qdrant at search time (``Modifier.IDF``), so
+    vectors stay valid as documents are added and removed.
+    """
+    term_counts = Counter(tokenize(text))
+    length_norm = 1 - BM25_B + BM25_B * sum(term_counts.values()) / BM25_AVG_DOC_TOKENS
+    return _to_sparse_vector(
+        {
+            token: count * (BM25_K1 + 1) / (count + BM25_K1 * length_norm)
+            for token, count in term_counts.items()
+        }
+    )
+
+
+def get_query_sparse_vector(text):
+    return _to_sparse_vector({token: 1.0 for token in set(tokenize(text))})
+
+
+def get_sparse_vectors_config():
+    return {SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)}
@@ -0,0 +1,86 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from ..config import UPSERT_BATCH_SIZE, UPSERT_PARALLELISM, UPSERT_WAIT
+
+
+class PointUploader:
+    """Upserts points in fixed-size batches from a small pool of threads.
+
+    With ``wait=False`` every batch except the last is sent without waiting
+    for Qdrant to apply it. The last batch is sent with ``wait=True`` after all
+    others were accepted; updates are applied in order, so it acts as a
+    consistency barrier for the whole upload.
+    """
+
+    def __init__(
+        self,
+        client,
+        collection_name,
+        batch_size=UPSERT_BATCH_SIZE,
+        parallelism=UPSERT_PARALLELISM,
+        wait=UPSERT_WAIT,
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.parallelism = parallelism
+        self.wait = wait
+        self.points_uploaded = 0
+        self._buffer = []
+        self._held_batch = None
+        self._futures = deque()
+        self._executor = ThreadPoolExecutor(
+            max_workers=parallelism, thread_name_prefix="qdrant-upsert"
+        )
+
+    def _upsert(self, batch, wait):
+        self.client.upsert(
+            collection_name=self.collection_name, points=batch, wait=wait
+        )
+        return len(batch)
+
+    def _submit(self, batch):
+        if not self.wait:
+            # Hold the newest batch back so it can serve as the barrier.
+            batch, self._held_batch = self._held_batch, batch
+            if batch is None:
+                return
+
+        self._futures.append(self._executor.submit(self._upsert, batch, self.wait))
+
+        # Bound the number of in-flight requests and surface errors early.
+        while len(self._futures) > self.parallelism * 2:
+            self.points_uploaded += self._futures.popleft().result()
+
+    def add(self, points):
+        self._buffer.extend(points)
+        while len(self._buffer) >= self.batch_size:
+            batch = self._buffer[: self.batch_size]
+            self._buffer = self._buffer[self.batch_size :]
+            self._submit(batch)
+
+    def flush(self):
+        if self._buffer:
+            self._submit(self._buffer)
+            self._buffer = []
+
+        while self._futures:
+            self.points_uploaded += self._futures.popleft().result()
+
+        if self._held_batch is not None:
+            self.points_uploaded += self._upsert(self._held_batch, wait=True)
+            self._held_batch = None
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            self.close()
@@ -0,0 +1,36 @@
+from src.vector_store.chunk import _split_markdown, chunk_markdown_stream
+
+TITLE = "Test guide"
+
+# Repeated headings give sections with the same metadata, which the header
+# splitter merges into one.
+MARKDOWN = "".join(
+    f"# Guide\n\n## Settings\n\n### Example\n\n"
+    f"Example {i} sets the timeout of the function to {i} seconds.\n\n"
+    f"### Example\n\nExample {i} also sets the memory size to {i * 128} MB.\n\n"
+    for i in range(1, 8)
+)
+
+
+def _chunk_stream(sections):
+    text_chunks, metadatas = [], []
+    for piece_chunks, piece_metadatas in chunk_markdown_stream(sections, TITLE):
+        text_chunks.extend(piece_chunks)
+        metadatas.extend(piece_metadatas)
+    return text_chunks, metadatas
+
+
+def test_stream_matches_whole_document_with_repeated_headings():
+    expected = _split_markdown(MARKDOWN, TITLE)
+
+    lines = MARKDOWN.splitlines(keepends=True)
+    for piece_lines in (1, 2, 3, 5, 8, 13):
+        sections = [
+            "".join(lines[i : i + piece_lines])
+            for i in range(0, len(lines), piece_lines)
+        ]
+        assert _chunk_stream(sections) == expected, piece_lines
+
+
+def test_stream_matches_whole_document_in_one_piece():
+    assert _chunk_stream([MARKDOWN]) == _split_markdown(MARKDOWN, TITLE)
@@ -0,0 +1,54 @@
+import asyncio
+
+from src.vector_store.embedding_scheduler import (
+    AdaptiveConcurrencyLimiter,
+    EmbeddingScheduler,
+)
+from src.vector_store.local_embeddings import LocalEmbeddings
+
+TEXTS = [f"Lambda function {i} reads objects from bucket {i}." for i in range(200)]
+
+
+def test_limiter_backs_off_on_throttling_and_grows_on_success():
+    async def run():
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=16)
+
+        await limiter.acquire()
+        await limiter.release(throttled=True)
+        assert limiter.limit == 4
+
+        for _ in range(200):
+            await limiter.acquire()
+            await limiter.release(throttled=False)
+        assert limiter.limit == 16
+
+    asyncio.run(run())
+
+
+def test_throttled_requests_are_retried_and_lower_the_limit():
+    embeddings = LocalEmbeddings(dimensions=8, latency=0.005, error_rate=0.2, seed=1)
+    scheduler = EmbeddingScheduler(
+        embeddings.embed_query, max_concurrency=8, base_backoff=0.001, max_retries=10
+    )
+
+    vectors = scheduler.embed(TEXTS)
+
+    assert vectors == [embeddings._vector(text) for text in TEXTS]
+    assert scheduler.stats["texts"] == len(TEXTS)
+    assert scheduler.stats["throttled"] > 0
+    assert scheduler.stats["retries"] == scheduler.stats["throttled"]
+    assert scheduler.limiter.limit < scheduler.max_concurrency
+
+
+def test_throttling_is_remembered_by_later_calls():
+    embeddings = LocalEmbeddings(dimensions=8, latency=0.005, error_rate=0.3, seed=2)
+    scheduler = EmbeddingScheduler(
+        embeddings.embed_query, max_concurrency=64, base_backoff=0.001, max_retries=10
+    )
+    scheduler.embed(TEXTS)
+
+    embeddings.error_rate = 0.0
+    scheduler.embed(TEXTS[:5])
+
+    # A fresh limiter would start at half of max_concurrency.
+    assert scheduler.limiter.limit < 32
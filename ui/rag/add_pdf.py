@@ -1,18 +1,23 @@
 import streamlit as st
 import asyncio
 from urllib.parse import urlparse
-import tempfile
-import os
-import time
-import requests
 
 try:
     asyncio.get_running_loop()
 except RuntimeError:
     asyncio.set_event_loop(asyncio.new_event_loop())
 
-from src.vector_store.qdrant_manager import ingest_chunks_from_pdf
-from src.utils.pdf import remove_toc_and_document_history_from_pdf
+from src.vector_store.ingest_jobs import (
+    JOB_DONE,
+    JOB_FAILED,
+    get_ingest_job_queue,
+)
+from src.vector_store.qdrant_manager import STAGE_LABELS
+
+JOB_POLL_SECONDS = 2
+JOB_STATE_ICONS = {"queued": "⏳", "running": "⚙️", "done": "👍", "failed": "❌"}
+
+job_queue = get_ingest_job_queue()
 
 st.title("Add AWS Documentation in PDF format")
 
@@ -70,48 +75,20 @@ with tab1:
             ["Fast (New)", "Regular (Slower)"],
             help="Fast mode is recommended for about 7x faster processing based on preliminary testing. Accuracy is very similar to the regular mode.",
         )
+        profile = st.selectbox(
+            "Regular mode profile",
+            ["Balanced", "Accurate", "Fast"],
+            help="Balanced runs OCR only on pages without a text layer and the accurate table model only on pages with tables. Accurate runs both on every page. Fast skips OCR and uses the fast table model.",
+        )
         submit_button = st.form_submit_button("Process PDF")
         if uploaded_file is not None and submit_button:
-            with st.status("Processing PDF...", expanded=True) as status:
-                try:
-                    with tempfile.NamedTemporaryFile(
-                        delete=False, suffix=".pdf"
-                    ) as tmp_file:
-                        tmp_file.write(uploaded_file.getvalue())
-                        input_path = tmp_file.name
-
-                    with tempfile.NamedTemporaryFile(
-                        delete=False, suffix="_optimized.pdf"
-                    ) as tmp_output:
-                        output_path = tmp_output.name
-
-                    status.write("✅ PDF uploaded successfully.")
-                    status.write("⚙️ Optimizing PDF...")
-                    pdf_optimization_start = time.time()
-                    remove_toc_and_document_history_from_pdf(input_path, output_path)
-                    pdf_optimization_time = time.time() - pdf_optimization_start
-                    status.write(
-                        f"✅ PDF optimization completed in {pdf_optimization_time:.2f} seconds."
-                    )
-
-                    total_time = ingest_chunks_from_pdf(
-                        output_path, status=status, mode=mode.lower()
-                    )
-
-                    os.unlink(input_path)
-                    os.unlink(output_path)
-
-                    status.update(
-                        label=f"👍 PDF processed and vectorized successfully in {(total_time + pdf_optimization_time):.2f} seconds!",
-                        state="complete",
-                        expanded=False,
-                    )
-                except Exception as e:
-                    status.update(
-                        label=f"An error occurred: {str(e)}",
-                        state="error",
-                        expanded=True,
-                    )
+            job_queue.submit_pdf(
+                uploaded_file.getvalue(),
+                uploaded_file.name,
+                mode=mode.lower(),
+                docling_profile=profile.lower(),
+            )
+            st.success(f"✅ {uploaded_file.name} added to the ingestion queue.")
 
 with tab2:
     with st.expander("⬇️ How to get AWS PDF format documentation URL"):
@@ -135,6 +112,11 @@ with tab2:
             ["Fast (New)", "Regular (Slower)"],
             help="Fast mode is recommended as it is about 7x faster processing based on preliminary testing.",
         )
+        profile = st.selectbox(
+            "Regular mode profile",
+            ["Balanced", "Accurate", "Fast"],
+            help="Balanced runs OCR only on pages without a text layer and the accurate table model only on pages with tables. Accurate runs both on every page. Fast skips OCR and uses the fast table model.",
+        )
         st.markdown(
             "Please ensure the URL is a valid AWS documentation link. For example: https://docs.aws.amazon.com/pdfs/AWSEC2/latest/UserGuide/ec2-ug.pdf"
         )
@@ -153,71 +135,53 @@ with tab2:
                 and "docs.aws.amazon.com" in parsed_url.netloc
                 and parsed_url.path.endswith(".pdf")
             ):
-                with st.status("Processing PDF...", expanded=True) as status:
-                    try:
-                        status.write("⚙️ Downloading PDF...")
-                        pdf_download_start = time.time()
-
-                        response = requests.get(clean_url, stream=True)
-                        pdf_download_time = time.time() - pdf_download_start
-                        status.write(
-                            f"✅ PDF download completed in {pdf_download_time:.2f} seconds."
-                        )
-
-                        if response.status_code != 200:
-                            raise Exception(
-                                f"Failed to download PDF. Status code: {response.status_code}"
-                            )
-
-                        content_type = response.headers.get("content-type", "").lower()
-                        if "application/pdf" not in content_type:
-                            raise Exception(
-                                f"URL does not point to a PDF file. Content type: {content_type}"
-                            )
-
-                        with tempfile.NamedTemporaryFile(
-                            delete=False, suffix=".pdf"
-                        ) as tmp_file:
-                            for chunk in response.iter_content(chunk_size=8192):
-                                if chunk:
-                                    tmp_file.write(chunk)
-                            input_path = tmp_file.name
-
-                        with tempfile.NamedTemporaryFile(
-                            delete=False, suffix="_optimized.pdf"
-                        ) as tmp_output:
-                            output_path = tmp_output.name
-
-                        status.write("⚙️ Optimizing PDF...")
-                        pdf_optimization_start = time.time()
-                        remove_toc_and_document_history_from_pdf(
-                            input_path, output_path
-                        )
-                        pdf_optimization_time = time.time() - pdf_optimization_start
-                        status.write(
-                            f"✅ PDF optimization completed in {pdf_optimization_time:.2f} seconds."
-                        )
-
-                        total_time = ingest_chunks_from_pdf(
-                            output_path, status=status, mode=mode.lower()
-                        )
-
-                        os.unlink(input_path)
-                        os.unlink(output_path)
-
-                        status.update(
-                            label=f"👍 PDF processed and vectorized successfully in {(total_time + pdf_download_time + pdf_optimization_time):.2f} seconds!",
-                            state="complete",
-                            expanded=False,
-                        )
-
-                    except Exception as e:
-                        status.update(
-                            label=f"An error occurred: {str(e)}",
-                            state="error",
-                            expanded=True,
-                        )
+                job_queue.submit_url(
+                    clean_url, mode=mode.lower(), docling_profile=profile.lower()
+                )
+                st.success(f"✅ {clean_url} added to the ingestion queue.")
             else:
                 st.warning("Please enter a valid URL")
         else:
             st.warning("Please enter a URL.")
+
+
+def _job_label(job):
+    icon = JOB_STATE_ICONS[job["state"]]
+    if job["state"] == JOB_DONE:
+        duration = job["finished_at"] - job["started_at"]
+        return (
+            f"{icon} {job['name']} - processed and vectorized in {duration:.2f} seconds"
+        )
+    if job["state"] == JOB_FAILED:
+        return f"{icon} {job['name']} - {job['error']}"
+    if job["label"]:
+        return f"{icon} {job['name']} - {job['label']}"
+    return f"{icon} {job['name']} - {job['state']}"
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_ingestion_jobs():
+    jobs = job_queue.list()
+    if not jobs:
+        return
+
+    st.subheader("Ingestion jobs")
+    for job in jobs:
+        state = {JOB_DONE: "complete", JOB_FAILED: "error"}.get(job["state"], "running")
+        with st.status(_job_label(job), state=state, expanded=False):
+            for message in job["messages"]:
+                st.write(message)
+            if job["progress"]:
+                st.table(
+                    {
+                        STAGE_LABELS[name]: {
+                            "Items": stage["items"],
+                            "Seconds": round(stage["elapsed"], 1),
+                            "Finished": "✅" if stage["finished"] else "",
+                        }
+                        for name, stage in job["progress"].items()
+                    }
+                )
+
+
+show_ingestion_jobs()
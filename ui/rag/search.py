@@ -1,8 +1,39 @@
 import streamlit as st
 import pandas as pd
 import re
-from src.vector_store.qdrant_manager import search_vectors
-from src.utils.qdrant import get_collection_metadata
+from src.vector_store.qdrant_manager import (
+    RETRIEVAL_MODE_AUTO,
+    RETRIEVAL_MODE_CHILD,
+    RETRIEVAL_MODE_PARENT,
+    search_vectors,
+)
+from src.config import SEARCH_HNSW_EF
+from src.utils.clients import check_qdrant_health
+from src.utils.qdrant import get_collection_metadata, get_document_titles
+from src.vector_store.embedding_cache import get_embedding_cache
+from src.vector_store.query_cache import get_query_cache
+from src.parsing.markdown_cache import get_markdown_cache
+
+RETRIEVAL_MODE_LABELS = {
+    RETRIEVAL_MODE_CHILD: "Matching chunks",
+    RETRIEVAL_MODE_AUTO: "Sections with several matches",
+    RETRIEVAL_MODE_PARENT: "Whole sections",
+}
+
+HEADING_SEPARATOR = "->"
+# Streamlit reruns the page on every widget change; Qdrant is asked at most
+# once per interval.
+VECTORDB_INFO_TTL_SECONDS = 10
+
+
+@st.cache_data(ttl=VECTORDB_INFO_TTL_SECONDS, show_spinner=False)
+def get_vectordb_info():
+    """Return the Qdrant health check, the document titles and the collection
+    metadata, or no titles and metadata if Qdrant is unreachable."""
+    qdrant_health = check_qdrant_health()
+    if not qdrant_health["ok"]:
+        return qdrant_health, [], None
+    return qdrant_health, get_document_titles(), get_collection_metadata()
 
 
 st.title("Search Vectors")
@@ -20,30 +51,73 @@ with st.sidebar:
     st.markdown("---")
 
     st.header("VectorDB Info")
-    vector_count, collection_status, optimizer_status = get_collection_metadata()
-
-    status_map = {
-        "green": "🟢",
-        "yellow": "🟡",
-        "red": "🔴",
-        "grey": "🟠",
-        "ok": "🟢",
-    }
-    collection_status_display = status_map.get(collection_status, "❓ Unknown status")
-    optimizer_status_display = status_map.get(optimizer_status, "❓ Unknown status")
+    qdrant_health, document_titles, collection_metadata = get_vectordb_info()
+    if not qdrant_health["ok"]:
+        st.error(f"❌ Qdrant is unreachable: {qdrant_health['error']}")
+    else:
+        vector_count, collection_status, optimizer_status = collection_metadata
+
+        status_map = {
+            "green": "🟢",
+            "yellow": "🟡",
+            "red": "🔴",
+            "grey": "🟠",
+            "ok": "🟢",
+        }
+        collection_status_display = status_map.get(
+            collection_status, "❓ Unknown status"
+        )
+        optimizer_status_display = status_map.get(optimizer_status, "❓ Unknown status")
+
+        info_data = {
+            "Metric": [
+                "Collection Status",
+                "Optimizer Status",
+                "Vector Count",
+                "Latency",
+            ],
+            "Value": [
+                collection_status_display,
+                optimizer_status_display,
+                str(vector_count),
+                f"{qdrant_health['latency'] * 1000:.0f} ms",
+            ],
+        }
+        info_df = pd.DataFrame(info_data)
+
+        st.dataframe(
+            info_df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Metric": st.column_config.TextColumn(
+                    "Metric",
+                    width="medium",
+                ),
+                "Value": st.column_config.TextColumn(
+                    "Value",
+                    width="medium",
+                ),
+            },
+        )
 
-    info_data = {
-        "Metric": ["Collection Status", "Optimizer Status", "Vector Count"],
+    st.header("Query Cache")
+    query_cache_stats = get_query_cache().stats()
+
+    query_cache_data = {
+        "Metric": ["Hits", "Misses", "Hit Rate", "Entries", "Latency Saved"],
         "Value": [
-            collection_status_display,
-            optimizer_status_display,
-            str(vector_count),
+            str(query_cache_stats["hits"]),
+            str(query_cache_stats["misses"]),
+            f"{query_cache_stats['hit_rate']:.1%}",
+            f"{query_cache_stats['entries']} / {query_cache_stats['max_entries']}",
+            f"{query_cache_stats['saved_seconds']:.1f} s",
         ],
     }
-    info_df = pd.DataFrame(info_data)
+    query_cache_df = pd.DataFrame(query_cache_data)
 
     st.dataframe(
-        info_df,
+        query_cache_df,
         use_container_width=True,
         hide_index=True,
         column_config={
@@ -58,18 +132,87 @@ with st.sidebar:
         },
     )
 
+    for cache_name, cache in [
+        ("Embedding Cache", get_embedding_cache()),
+        ("Parsed Markdown Cache", get_markdown_cache()),
+    ]:
+        st.header(cache_name)
+        cache_stats = cache.stats()
+
+        cache_data = {
+            "Metric": ["Hits", "Misses", "Hit Rate", "Entries", "Size"],
+            "Value": [
+                str(cache_stats["hits"]),
+                str(cache_stats["misses"]),
+                f"{cache_stats['hit_rate']:.1%}",
+                str(cache_stats["entries"]),
+                f"{cache_stats['size_bytes'] / 1024 / 1024:.1f} / {cache_stats['max_bytes'] / 1024 / 1024:.0f} MB",
+            ],
+        }
+        cache_df = pd.DataFrame(cache_data)
+
+        st.dataframe(
+            cache_df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Metric": st.column_config.TextColumn(
+                    "Metric",
+                    width="medium",
+                ),
+                "Value": st.column_config.TextColumn(
+                    "Value",
+                    width="medium",
+                ),
+            },
+        )
+
 with st.form(key="search_text_form"):
     search_text = st.text_input("Enter content:")
     search_limit = st.number_input(
         "Number of results to return:", min_value=1, max_value=100, value=5
     )
+    retrieval_mode = st.radio(
+        "Return:",
+        options=[RETRIEVAL_MODE_CHILD, RETRIEVAL_MODE_AUTO, RETRIEVAL_MODE_PARENT],
+        format_func=RETRIEVAL_MODE_LABELS.get,
+        horizontal=True,
+    )
+    hnsw_ef = st.number_input(
+        "HNSW ef (0 uses the collection default):",
+        min_value=0,
+        max_value=4096,
+        value=SEARCH_HNSW_EF or 0,
+        help="Higher values find more of the true nearest neighbours, at the cost of latency.",
+    )
+    selected_titles = st.multiselect(
+        "Only search these documents:",
+        options=document_titles,
+        placeholder="All documents",
+    )
+    header_path = st.text_input(
+        "Only search under these headings:",
+        placeholder="Lambda functions -> Configuring functions",
+        help=f"Headings as shown in the results, separated by '{HEADING_SEPARATOR}'. Each heading may be at any level.",
+    )
 
     submitted = st.form_submit_button("Submit")
 
 if submitted:
     if search_text:
         with st.spinner("Processing..."):
-            found_vectors = search_vectors(search_text, limit=search_limit)
+            found_vectors = search_vectors(
+                search_text,
+                limit=search_limit,
+                retrieval_mode=retrieval_mode,
+                hnsw_ef=hnsw_ef or None,
+                document_titles=selected_titles,
+                header_path=[
+                    heading.strip()
+                    for heading in header_path.split(HEADING_SEPARATOR)
+                    if heading.strip()
+                ],
+            )
         st.toast("✅ Search completed successfully!")
         if found_vectors:
             st.write("## Vector search results:")